@@ -1,9 +1,39 @@
 import pygame
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from ai_player import TetrisAI
 
+THINK_WORKERS = ('sync', 'thread', 'process')
+
+_worker_ai = None
+
+def search_position(game, backend, extended_weights=None):
+    # Runs on the worker and returns every legal placement with its features.
+    # The AI is kept between calls so its backend tables survive. Scoring is
+    # left to the main thread, so the sliders can re-rank the result without
+    # another search; only the extended weights travel, as they pick the
+    # feature set.
+    global _worker_ai
+    if _worker_ai is None or _worker_ai.backend != backend:
+        _worker_ai = TetrisAI(backend)
+    _worker_ai.set_extended_weights(extended_weights)
+    return _worker_ai.get_candidates(game, reachable=False)
+
 class AIControls:
-    def __init__(self):
-        self.ai = TetrisAI()
+    def __init__(self, backend='python', think_worker='sync'):
+        self.ai = TetrisAI(backend)
+        self.think_worker = think_worker
+        self.executor = None
+        if think_worker == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        elif think_worker == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        self.pending = None
+        self.pending_piece = None
+        self.pending_extended = None
+        self.ranked_version = None
+        self.discarded_searches = 0
         self.current_move_sequence = []
         self.move_timer = 0
         self.move_delay = 100
@@ -24,6 +54,9 @@ class AIControls:
     def set_ai_weights(self, hole_weight, landing_height_weight, lines_cleared_weight=10.0, bumpiness_weight=-2.0):
         self.ai.set_weights(hole_weight, landing_height_weight, lines_cleared_weight, bumpiness_weight)
     
+    def load_ai_weights(self, path):
+        self.ai.load_weights(path)
+    
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_p:
@@ -40,15 +73,14 @@ class AIControls:
         self.move_timer += dt
         self.last_think_time += dt
         
-        if not self.current_move_sequence and self.last_think_time >= self.thinking_delay:
-            self.current_best_move = self.ai.get_best_move(game)
-            if self.current_best_move:
-                self.current_move_sequence = self.ai.get_move_sequence(
-                    game, 
-                    self.current_best_move['rotation'], 
-                    self.current_best_move['x']
-                )
-            self.last_think_time = 0
+        if self.executor is not None:
+            self.update_background_search(game)
+        elif not self.current_move_sequence and self.last_think_time >= self.thinking_delay:
+            self.set_best_move(game, self.ai.get_best_move(game))
+        if self.ranked_version != self.ai.weights_version and self.ai.has_position(game):
+            # A slider moved: re-rank the known candidates and steer the piece
+            # from wherever it is now.
+            self.set_best_move(game, self.ai.get_best_move(game))
         
         if self.current_move_sequence and self.move_timer >= self.move_delay:
             next_move = self.current_move_sequence.pop(0)
@@ -64,6 +96,85 @@ class AIControls:
             
             self.move_timer = 0
     
+    def play_turbo(self, game, max_pieces, time_budget):
+        # Places pieces straight through apply_placement, skipping the input
+        # timers; stops after max_pieces or time_budget seconds.
+        self.cancel_search()
+        self.current_move_sequence = []
+        deadline = time.perf_counter() + time_budget
+        placed = 0
+        while placed < max_pieces and not game.game_over and time.perf_counter() < deadline:
+            self.current_best_move = self.ai.get_best_move(game)
+            move = self.current_best_move
+            if move is None or not game.apply_placement(move['rotation'], move['x']):
+                game.game_over = True
+                break
+            placed += 1
+        return placed
+    
+    def set_best_move(self, game, best_move):
+        self.current_best_move = best_move
+        self.ranked_version = self.ai.weights_version
+        if self.current_best_move:
+            self.current_move_sequence = self.ai.get_move_sequence(
+                game, 
+                self.current_best_move['rotation'], 
+                self.current_best_move['x']
+            )
+        self.last_think_time = 0
+    
+    def update_background_search(self, game):
+        if self.pending is not None:
+            if self.pending_piece is not game.current_piece or self.pending_extended != self.ai.extended_weights:
+                self.cancel_search()
+            elif self.pending.done():
+                future = self.pending
+                self.pending = None
+                try:
+                    candidates = future.result()
+                except Exception as error:
+                    self.stop_worker(error)
+                    self.set_best_move(game, self.ai.get_best_move(game))
+                    return
+                self.ai.set_position(game, *candidates)
+                self.set_best_move(game, self.ai.get_best_move(game))
+        
+        if self.pending is None and not self.current_move_sequence and self.last_think_time >= self.thinking_delay:
+            try:
+                self.pending = self.executor.submit(search_position, game.snapshot(), self.ai.backend,
+                                                    self.ai.extended_weights)
+            except Exception as error:
+                self.stop_worker(error)
+                self.set_best_move(game, self.ai.get_best_move(game))
+                return
+            self.pending_piece = game.current_piece
+            self.pending_extended = self.ai.extended_weights
+    
+    def stop_worker(self, error):
+        # A failed worker (e.g. a broken process pool) must not take the game
+        # down: report it and think on the main thread from now on.
+        print(f"AI worker failed ({error!r}); searching synchronously instead", file=sys.stderr)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        self.think_worker = 'sync'
+    
+    def cancel_search(self):
+        # A search that already started cannot be interrupted; its result is
+        # simply dropped and a fresh one is queued behind it.
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+            self.discarded_searches += 1
+    
+    def is_thinking(self):
+        return self.pending is not None
+    
+    def close(self):
+        if self.executor is not None:
+            self.cancel_search()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    
     def get_action(self, action_name):
         return self.actions.get(action_name, False)
     
@@ -118,6 +229,8 @@ class AIControls:
                 'holes': self.current_best_move['holes'],
                 'landing_height': self.current_best_move['landing_height'],
                 'lines_cleared': self.current_best_move['lines_cleared'],
-                'bumpiness': self.current_best_move['bumpiness']
+                'bumpiness': self.current_best_move['bumpiness'],
+                'rotation': self.current_best_move['rotation'],
+                'x': self.current_best_move['x']
             }
         return None
\ No newline at end of file
@@ -1,7 +1,15 @@
+import argparse
 import pygame
 import sys
-from game import TetrisGame
-from ai_controls import AIControls
+import time
+from bitboard_game import GAME_ENGINES
+from ai_controls import AIControls, THINK_WORKERS
+from ai_player import TetrisAI
+from dirty_rects import DirtyRects, board_cells
+from piece_generator import PIECE_GENERATORS, make_generator
+from replay import GameRecorder
+from render_cache import RenderCache
+from profiler import FrameProfiler, NullProfiler
 
 class Slider:
     def __init__(self, x, y, width, height, min_val, max_val, initial_val, label):
@@ -27,15 +35,15 @@ class Slider:
             self.val = self.min_val + (rel_x / self.slider_rect.width) * (self.max_val - self.min_val)
             self.handle_rect.centerx = self.slider_rect.x + rel_x
     
-    def draw(self, screen, font):
+    def draw(self, screen, font, render_cache):
         pygame.draw.rect(screen, (100, 100, 100), self.slider_rect)
         pygame.draw.rect(screen, (200, 200, 200), self.handle_rect)
         
-        label_text = font.render(f"{self.label}: {self.val:.1f}", True, (255, 255, 255))
+        label_text = render_cache.text(font, f"{self.label}: {self.val:.1f}", (255, 255, 255))
         screen.blit(label_text, (self.slider_rect.x, self.slider_rect.y - 25))
 
 class AITetrisRenderer:
-    def __init__(self, game):
+    def __init__(self, game, initial_weights=(-5, -1, 10, -2), dirty_rects=False):
         self.game = game
         self.BLOCK_SIZE = game.BLOCK_SIZE
         self.BOARD_WIDTH = game.BOARD_WIDTH * self.BLOCK_SIZE
@@ -62,25 +70,23 @@ class AITetrisRenderer:
         self.large_font = pygame.font.Font(None, 32)
         
         control_x = self.BOARD_WIDTH + self.SIDEBAR_WIDTH + 20
+        hole, landing_height, lines_cleared, bumpiness = initial_weights
         self.sliders = [
-            Slider(control_x, 50, 180, 20, -10, 10, -5, "Hole Weight"),
-            Slider(control_x, 120, 180, 20, -10, 10, -1, "Landing Height Weight"),
-            Slider(control_x, 190, 180, 20, -10, 10, 10, "Lines Cleared Weight"),
-            Slider(control_x, 260, 180, 20, -10, 10, -2, "Bumpiness Weight")
+            Slider(control_x, 50, 180, 20, -10, 10, hole, "Hole Weight"),
+            Slider(control_x, 120, 180, 20, -10, 10, landing_height, "Landing Height Weight"),
+            Slider(control_x, 190, 180, 20, -10, 10, lines_cleared, "Lines Cleared Weight"),
+            Slider(control_x, 260, 180, 20, -10, 10, bumpiness, "Bumpiness Weight")
         ]
         
-    def draw_block(self, x, y, color, alpha=255):
-        rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE, 
-                          self.BLOCK_SIZE, self.BLOCK_SIZE)
+        self.PROFILER_RECT = pygame.Rect(5, 5, 230, 6 * 18 + 10)
+        self.render_cache = RenderCache(self.BLOCK_SIZE)
+        self.dirty = None
+        self.overlay_key = None
+        if dirty_rects:
+            self.dirty = DirtyRects(self.screen, self.build_background())
         
-        if alpha < 255:
-            surf = pygame.Surface((self.BLOCK_SIZE, self.BLOCK_SIZE))
-            surf.set_alpha(alpha)
-            surf.fill(color)
-            self.screen.blit(surf, rect)
-        else:
-            pygame.draw.rect(self.screen, color, rect)
-            pygame.draw.rect(self.screen, self.WHITE, rect, 1)
+    def draw_block(self, x, y, color, alpha=255):
+        self.screen.blit(self.render_cache.block(color, alpha), (x * self.BLOCK_SIZE, y * self.BLOCK_SIZE))
     
     def draw_board(self):
         for y in range(self.game.BOARD_HEIGHT):
@@ -89,9 +95,12 @@ class AITetrisRenderer:
                     color = self.game.board_colors[y][x]
                     self.draw_block(x, y, color)
                 else:
-                    rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE,
-                                     self.BLOCK_SIZE, self.BLOCK_SIZE)
-                    pygame.draw.rect(self.screen, self.DARK_GRAY, rect, 1)
+                    self.draw_empty_cell(x, y)
+    
+    def draw_empty_cell(self, x, y):
+        rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE,
+                         self.BLOCK_SIZE, self.BLOCK_SIZE)
+        pygame.draw.rect(self.screen, self.DARK_GRAY, rect, 1)
     
     def draw_piece(self, piece, alpha=255):
         for x, y in piece.get_blocks():
@@ -106,87 +115,86 @@ class AITetrisRenderer:
         next_x = self.BOARD_WIDTH + 20
         next_y = 50
         
-        text = self.font.render("Next:", True, self.WHITE)
+        text = self.render_cache.text(self.font, "Next:", self.WHITE)
         self.screen.blit(text, (next_x, next_y - 30))
         
-        shape = self.game.next_piece.get_shape()
-        for row_idx, row in enumerate(shape):
-            for col_idx, cell in enumerate(row):
-                if cell == '#':
-                    x = next_x + col_idx * 20
-                    y = next_y + row_idx * 20
-                    rect = pygame.Rect(x, y, 20, 20)
-                    pygame.draw.rect(self.screen, self.game.next_piece.color, rect)
-                    pygame.draw.rect(self.screen, self.WHITE, rect, 1)
+        for col_idx, row_idx in self.game.next_piece.get_offsets():
+            x = next_x + col_idx * 20
+            y = next_y + row_idx * 20
+            self.screen.blit(self.render_cache.block(self.game.next_piece.color, size=20), (x, y))
     
     def draw_score(self):
         score_x = self.BOARD_WIDTH + 20
         score_y = 150
         
-        score_text = self.font.render(f"Score: {self.game.score}", True, self.WHITE)
+        score_text = self.render_cache.text(self.font, f"Score: {self.game.score}", self.WHITE)
         self.screen.blit(score_text, (score_x, score_y))
         
-        lines_text = self.font.render(f"Lines: {self.game.lines_cleared}", True, self.WHITE)
+        lines_text = self.render_cache.text(self.font, f"Lines: {self.game.lines_cleared}", self.WHITE)
         self.screen.blit(lines_text, (score_x, score_y + 30))
         
-        level_text = self.font.render(f"Level: {self.game.level}", True, self.WHITE)
+        level_text = self.render_cache.text(self.font, f"Level: {self.game.level}", self.WHITE)
         self.screen.blit(level_text, (score_x, score_y + 60))
     
     def draw_ai_info(self, ai_controls):
         info_x = self.BOARD_WIDTH + 20
         info_y = 280
         
-        title = self.font.render("AI Analysis:", True, self.WHITE)
+        title = self.render_cache.text(self.font, "AI Analysis:", self.WHITE)
         self.screen.blit(title, (info_x, info_y))
         
         evaluation = ai_controls.get_current_evaluation()
         if evaluation:
             y_offset = info_y + 30
             
-            score_text = self.small_font.render(f"Move Score: {evaluation['score']:.1f}", True, self.WHITE)
+            score_text = self.render_cache.text(self.small_font, f"Move Score: {evaluation['score']:.1f}   Target: x={evaluation['x']} r={evaluation['rotation']}",
+                                                self.WHITE)
             self.screen.blit(score_text, (info_x, y_offset))
             
             holes_color = self.RED if evaluation['holes'] > 5 else self.WHITE
-            holes_text = self.small_font.render(f"Holes: {evaluation['holes']}", True, holes_color)
+            holes_text = self.render_cache.text(self.small_font, f"Holes: {evaluation['holes']}", holes_color)
             self.screen.blit(holes_text, (info_x, y_offset + 20))
             
             height_color = self.RED if evaluation['landing_height'] > 15 else self.WHITE
-            height_text = self.small_font.render(f"Landing Height: {evaluation['landing_height']}", True, height_color)
+            height_text = self.render_cache.text(self.small_font, f"Landing Height: {evaluation['landing_height']}", height_color)
             self.screen.blit(height_text, (info_x, y_offset + 40))
             
             lines_color = self.GREEN if evaluation['lines_cleared'] > 0 else self.WHITE
-            lines_text = self.small_font.render(f"Lines Cleared: {evaluation['lines_cleared']}", True, lines_color)
+            lines_text = self.render_cache.text(self.small_font, f"Lines Cleared: {evaluation['lines_cleared']}", lines_color)
             self.screen.blit(lines_text, (info_x, y_offset + 60))
             
             bump_color = self.RED if evaluation['bumpiness'] > 10 else self.WHITE
-            bump_text = self.small_font.render(f"Bumpiness: {evaluation['bumpiness']:.1f}", True, bump_color)
+            bump_text = self.render_cache.text(self.small_font, f"Bumpiness: {evaluation['bumpiness']:.1f}", bump_color)
             self.screen.blit(bump_text, (info_x, y_offset + 80))
     
     def draw_controls(self):
         control_x = self.BOARD_WIDTH + self.SIDEBAR_WIDTH + 20
         control_y = 330
         
-        title = self.large_font.render("AI Controls", True, self.WHITE)
+        title = self.render_cache.text(self.large_font, "AI Controls", self.WHITE)
         self.screen.blit(title, (control_x, 10))
         
         instructions = [
             "Adjust sliders to tune AI:",
             "",
             "P - Pause",
+            "T - Turbo mode",
             "ESC - Quit",
             "R - Restart (when game over)",
+            "F3 - Timing overlay",
+            "F4 - Save timing timeline",
             "",
             "Optimal values vary based",
             "on playing style preference."
         ]
         
         for i, text in enumerate(instructions):
-            rendered = self.small_font.render(text, True, self.WHITE)
+            rendered = self.render_cache.text(self.small_font, text, self.WHITE)
             self.screen.blit(rendered, (control_x, control_y + i * 20))
     
     def draw_sliders(self):
         for slider in self.sliders:
-            slider.draw(self.screen, self.small_font)
+            slider.draw(self.screen, self.small_font, self.render_cache)
     
     def draw_game_over(self):
         if self.game.game_over:
@@ -195,10 +203,10 @@ class AITetrisRenderer:
             overlay.fill(self.BLACK)
             self.screen.blit(overlay, (0, 0))
             
-            game_over_text = self.large_font.render("GAME OVER", True, self.WHITE)
-            score_text = self.font.render(f"Final Score: {self.game.score}", True, self.WHITE)
-            lines_text = self.font.render(f"Lines Cleared: {self.game.lines_cleared}", True, self.WHITE)
-            restart_text = self.font.render("Press R to restart", True, self.WHITE)
+            game_over_text = self.render_cache.text(self.large_font, "GAME OVER", self.WHITE)
+            score_text = self.render_cache.text(self.font, f"Final Score: {self.game.score}", self.WHITE)
+            lines_text = self.render_cache.text(self.font, f"Lines Cleared: {self.game.lines_cleared}", self.WHITE)
+            restart_text = self.render_cache.text(self.font, "Press R to restart", self.WHITE)
             
             game_over_rect = game_over_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2 - 60))
             score_rect = score_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2 - 20))
@@ -217,10 +225,30 @@ class AITetrisRenderer:
             overlay.fill(self.BLACK)
             self.screen.blit(overlay, (0, 0))
             
-            paused_text = self.large_font.render("PAUSED", True, self.WHITE)
+            paused_text = self.render_cache.text(self.large_font, "PAUSED", self.WHITE)
             text_rect = paused_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2))
             self.screen.blit(paused_text, text_rect)
     
+    def draw_profiler(self, summary):
+        if summary is None:
+            return
+        lines = [
+            f"FPS: {summary['fps']:.1f}",
+            f"Frame: {summary['frame_ms']:.1f} ms (max {summary['frame_max_ms']:.1f})"
+        ]
+        for phase in ('events', 'think', 'update', 'render'):
+            if phase in summary['phase_ms']:
+                lines.append(f"{phase.capitalize()}: {summary['phase_ms'][phase]:.2f} ms "
+                             f"(max {summary['phase_max_ms'][phase]:.2f})")
+        
+        overlay = pygame.Surface((self.PROFILER_RECT.width, len(lines) * 18 + 10))
+        overlay.set_alpha(180)
+        overlay.fill(self.BLACK)
+        self.screen.blit(overlay, self.PROFILER_RECT.topleft)
+        for i, text in enumerate(lines):
+            rendered = self.render_cache.text(self.small_font, text, self.GREEN)
+            self.screen.blit(rendered, (10, 10 + i * 18))
+    
     def handle_slider_events(self, event):
         for slider in self.sliders:
             slider.handle_event(event)
@@ -228,7 +256,70 @@ class AITetrisRenderer:
     def get_slider_values(self):
         return [slider.val for slider in self.sliders]
     
-    def render(self, ai_controls):
+    def build_background(self):
+        screen = self.screen
+        self.screen = pygame.Surface(screen.get_size())
+        self.screen.fill(self.BLACK)
+        for y in range(self.game.BOARD_HEIGHT):
+            for x in range(self.game.BOARD_WIDTH):
+                self.draw_empty_cell(x, y)
+        self.draw_controls()
+        background = self.screen
+        self.screen = screen
+        return background
+    
+    def cell_rect(self, index):
+        x = index % self.game.BOARD_WIDTH
+        y = index // self.game.BOARD_WIDTH
+        return pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE, self.BLOCK_SIZE, self.BLOCK_SIZE)
+    
+    def draw_cell(self, index, cell):
+        self.draw_block(index % self.game.BOARD_WIDTH, index // self.game.BOARD_WIDTH, cell[0], cell[1])
+    
+    def render_dirty(self, ai_controls, profile_summary):
+        # Returns False when the frame needs a full redraw instead: the pause
+        # and game over overlays cover the whole window.
+        game = self.game
+        hud = (game.score, game.lines_cleared, game.level)
+        evaluation = ai_controls.get_current_evaluation()
+        evaluation_key = tuple(evaluation.values()) if evaluation else None
+        sliders = tuple(self.get_slider_values())
+        if game.game_over or game.paused:
+            key = (game.game_over, game.paused, hud, evaluation_key, sliders)
+            if key == self.overlay_key:
+                return True
+            self.overlay_key = key
+            self.dirty.invalidate()
+            return False
+        self.overlay_key = None
+        
+        dirty = self.dirty
+        dirty.begin()
+        # The timing overlay sits on top of the board, so the cells beneath it
+        # are repainted before the overlay is drawn again.
+        profiler_changed = dirty.update_region('profiler', self.PROFILER_RECT, profile_summary, None)
+        if profiler_changed:
+            dirty.forget_cells(self.PROFILER_RECT, self.cell_rect)
+        dirty.update_cells(board_cells(game, self.GHOST_ALPHA), self.cell_rect, self.draw_cell)
+        if profiler_changed:
+            self.draw_profiler(profile_summary)
+        
+        dirty.update_region('next', pygame.Rect(self.BOARD_WIDTH, 0, self.SIDEBAR_WIDTH, 150),
+                            (game.next_piece.shape_type, game.next_piece.color), self.draw_next_piece)
+        dirty.update_region('score', pygame.Rect(self.BOARD_WIDTH, 150, self.SIDEBAR_WIDTH, 120),
+                            hud, self.draw_score)
+        dirty.update_region('ai_info', pygame.Rect(self.BOARD_WIDTH, 270, self.SIDEBAR_WIDTH, 140),
+                            evaluation_key, lambda: self.draw_ai_info(ai_controls))
+        for i, slider in enumerate(self.sliders):
+            rect = pygame.Rect(slider.rect.x - 6, slider.rect.y - 25, self.CONTROL_PANEL_WIDTH - 14, slider.rect.height + 27)
+            dirty.update_region(('slider', i), rect, slider.val, lambda: slider.draw(self.screen, self.small_font, self.render_cache))
+        dirty.finish()
+        return True
+    
+    def render(self, ai_controls, profile_summary=None):
+        if self.dirty is not None and self.render_dirty(ai_controls, profile_summary):
+            return
+        
         self.screen.fill(self.BLACK)
         
         self.draw_board()
@@ -244,20 +335,63 @@ class AITetrisRenderer:
         self.draw_sliders()
         self.draw_game_over()
         self.draw_paused()
+        self.draw_profiler(profile_summary)
         
         pygame.display.flip()
 
+TURBO_TIME_SLICE = 0.05
+
 def main():
+    parser = argparse.ArgumentParser(description="Watch the AI play Tetris.")
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--pieces', help=f"piece generator: {', '.join(PIECE_GENERATORS)} or a fixed sequence like IOTSZJL")
+    parser.add_argument('--seed', type=int, default=None, help="seed for --pieces")
+    parser.add_argument('--record', help="append every game to this replay file")
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    parser.add_argument('--weights-file', help="JSON weights, e.g. written by weight_optimizer.py")
+    parser.add_argument('--dirty-rects', action='store_true', help="redraw only the parts of the window that changed")
+    parser.add_argument('--turbo', action='store_true', help="start in turbo mode (toggle with T)")
+    parser.add_argument('--render-every', type=int, default=10, help="pieces placed between frames in turbo mode")
+    parser.add_argument('--think-worker', choices=THINK_WORKERS, default='thread',
+                        help="where the AI search runs; sync blocks the render loop")
+    parser.add_argument('--profile', action='store_true', help="record frame timings and show the overlay from the start")
+    parser.add_argument('--profile-out', default='frame_timeline.json', help="timeline written by F4 and on exit")
+    parser.add_argument('--profile-frames', type=int, default=1800, help="frames kept in the timing ring buffer")
+    args = parser.parse_args()
+    if args.render_every < 1:
+        parser.error("--render-every must be at least 1")
+    
     pygame.init()
     clock = pygame.time.Clock()
     
-    game = TetrisGame()
-    renderer = AITetrisRenderer(game)
-    ai_controls = AIControls()
+    piece_source = make_generator(args.pieces, args.seed) if args.pieces else None
+    game = GAME_ENGINES[args.engine](piece_source=piece_source)
+    game_recorder = None
+    if args.record:
+        game_recorder = GameRecorder(args.record, args.seed, args.pieces or '')
+        game_recorder.attach(game)
+    if args.weights_file:
+        renderer = AITetrisRenderer(game, TetrisAI.read_weights(args.weights_file), args.dirty_rects)
+    else:
+        renderer = AITetrisRenderer(game, dirty_rects=args.dirty_rects)
+    ai_controls = AIControls(args.backend, args.think_worker)
+    if args.weights_file:
+        ai_controls.load_ai_weights(args.weights_file)
+    
+    recorder = FrameProfiler(args.profile_frames)
+    profiler = recorder if args.profile else NullProfiler()
+    
+    turbo = args.turbo
+    turbo_pieces = 0
+    rate_pieces = 0
+    rate_start = time.perf_counter()
     
     running = True
     while running:
-        dt = clock.tick(60)
+        profiler.begin_frame()
+        # Turbo mode runs uncapped; the game over and pause screens do not.
+        dt = clock.tick(0 if turbo and not game.game_over and not game.paused else 60)
+        profiler.mark('wait')
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -265,6 +399,15 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r and game.game_over:
                     game.reset_game()
+                elif event.key == pygame.K_F3:
+                    profiler.pause()
+                    profiler = NullProfiler() if profiler.enabled else recorder
+                elif event.key == pygame.K_F4:
+                    print(f"Saved {recorder.dump(args.profile_out)} frames to {args.profile_out}")
+                elif event.key == pygame.K_t:
+                    turbo = not turbo
+                    turbo_pieces = 0
+                    pygame.display.set_caption("AI Tetris")
                 else:
                     ai_controls.handle_event(event)
             else:
@@ -276,13 +419,20 @@ def main():
         
         if ai_controls.is_quit_pressed():
             running = False
+        profiler.mark('events')
         
         if not game.game_over:
             if ai_controls.is_pause_pressed():
                 game.toggle_pause()
             
-            if not game.paused:
+            if turbo and not game.paused:
+                placed = ai_controls.play_turbo(game, args.render_every - turbo_pieces, TURBO_TIME_SLICE)
+                turbo_pieces += placed
+                rate_pieces += placed
+                profiler.mark('think')
+            elif not game.paused:
                 ai_controls.update_ai(game, dt)
+                profiler.mark('think')
                 
                 if ai_controls.is_left_pressed():
                     game.move_piece(-1, 0)
@@ -296,9 +446,23 @@ def main():
                     game.hard_drop()
                 
                 game.update(dt)
+        profiler.mark('update')
+        
+        if turbo and time.perf_counter() - rate_start >= 1:
+            pygame.display.set_caption(f"AI Tetris - turbo {rate_pieces / (time.perf_counter() - rate_start):.0f} pieces/s")
+            rate_pieces = 0
+            rate_start = time.perf_counter()
         
-        renderer.render(ai_controls)
+        if not turbo or turbo_pieces >= args.render_every or game.game_over or game.paused:
+            renderer.render(ai_controls, profiler.summary())
+            turbo_pieces = 0
+        profiler.mark('render')
     
+    if args.profile and recorder.dump(args.profile_out):
+        print(f"Saved frame timeline to {args.profile_out}")
+    ai_controls.close()
+    if game_recorder is not None:
+        game_recorder.close(game)
     pygame.quit()
     sys.exit()
 
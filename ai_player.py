@@ -1,18 +1,153 @@
-import copy
+import json
+from placements import filter_reachable, get_placements, get_reachable_placements, get_reachable_ranges
 from tetromino import Tetromino
 
+_row_tables = {}
+
+def get_row_tables(width):
+    # Per row bitmask: the filled/empty transitions along the row with both
+    # walls counted as filled, and the empty cells walled in on both sides.
+    tables = _row_tables.get(width)
+    if tables is None:
+        full = (1 << width) - 1
+        right_wall = 1 << (width - 1)
+        transitions = []
+        walled = []
+        for row in range(1 << width):
+            transitions.append(((row << 1 | 1) ^ (row | 1 << width)).bit_count())
+            walled.append(~row & (row << 1 | 1) & (row >> 1 | right_wall) & full)
+        tables = (transitions, walled)
+        _row_tables[width] = tables
+    return tables
+
+_piece_layouts = {}
+
+def get_piece_layout(shape_type, rotation, x, width):
+    # For a rotation at column x: (dy, row bitmask) per row it covers,
+    # (column, highest dy, lowest dy, column bitmask at y=0) per column it
+    # covers, and the columns whose wells it can change.
+    key = (shape_type, rotation, x, width)
+    layout = _piece_layouts.get(key)
+    if layout is None:
+        row_bits = {}
+        for dx, dy in Tetromino.BLOCKS[shape_type][rotation]:
+            row_bits[dy] = row_bits.get(dy, 0) | 1 << (x + dx)
+        columns = tuple((x + dx, top, bottom, ((1 << (bottom - top + 1)) - 1) << top)
+                        for (dx, top), (_, bottom) in zip(Tetromino.TOP_PROFILE[shape_type][rotation],
+                                                          Tetromino.BOTTOM_PROFILE[shape_type][rotation]))
+        neighbours = range(max(columns[0][0] - 1, 0), min(columns[-1][0] + 2, width))
+        layout = (tuple(sorted(row_bits.items())), columns, neighbours)
+        _piece_layouts[key] = layout
+    return layout
+
+def well_depths(cells):
+    # cells is a column bitmask of well cells, bit y for row y; each run of d
+    # cells adds 1 + 2 + ... + d.
+    wells = 0
+    while cells:
+        rest = cells + (cells & -cells)
+        depth = (cells & ~rest).bit_count()
+        wells += depth * (depth + 1) // 2
+        cells &= rest
+    return wells
+
 class TetrisAI:
-    def __init__(self):
+    BACKENDS = ('python', 'numpy')
+    WEIGHT_NAMES = ('hole_weight', 'landing_height_weight', 'lines_cleared_weight', 'bumpiness_weight')
+    EXTENDED_WEIGHT_NAMES = ('row_transitions_weight', 'column_transitions_weight', 'wells_weight',
+                             'eroded_cells_weight', 'hole_depth_weight', 'rows_with_holes_weight')
+    FEATURE_NAMES = ('holes', 'landing_height', 'lines_cleared', 'bumpiness', 'row_transitions',
+                     'column_transitions', 'wells', 'eroded_cells', 'hole_depth', 'rows_with_holes')
+    
+    def __init__(self, backend='python', cache_size=0):
         self.hole_weight = -5.0
         self.landing_height_weight = -1.0
         self.lines_cleared_weight = 10.0
         self.bumpiness_weight = -2.0
+        self.extended_weights = None
+        self.weights_version = 0
+        self.position = None
+        self.position_candidates = None
+        self.set_backend(backend)
+        self.set_cache_size(cache_size)
+    
+    def set_backend(self, backend):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown AI backend: {backend}")
+        self.backend = backend
+        self.batch_evaluator = None
+        if backend == 'numpy':
+            from batch_evaluator import BatchEvaluator
+            self.batch_evaluator = BatchEvaluator()
+        
+    def set_cache_size(self, cache_size):
+        self.cache = None
+        if cache_size:
+            from transposition import TranspositionCache
+            self.cache = TranspositionCache(cache_size)
+    
+    @staticmethod
+    def read_weights(path):
+        with open(path) as f:
+            data = json.load(f)
+        return tuple(float(data[name]) for name in TetrisAI.WEIGHT_NAMES)
+    
+    @staticmethod
+    def read_extended_weights(path):
+        # None when the file only has the four basic weights.
+        with open(path) as f:
+            data = json.load(f)
+        if not any(name in data for name in TetrisAI.EXTENDED_WEIGHT_NAMES):
+            return None
+        return tuple(float(data.get(name, 0.0)) for name in TetrisAI.EXTENDED_WEIGHT_NAMES)
+    
+    @staticmethod
+    def write_weights(path, weights, **extra):
+        data = dict(zip(TetrisAI.WEIGHT_NAMES, weights))
+        data.update(extra)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+    
+    def load_weights(self, path):
+        self.set_weights(*self.read_weights(path))
+        self.set_extended_weights(self.read_extended_weights(path))
+    
+    def get_weights(self):
+        return (self.hole_weight, self.landing_height_weight, self.lines_cleared_weight, self.bumpiness_weight)
         
     def set_weights(self, hole_weight, landing_height_weight, lines_cleared_weight=10.0, bumpiness_weight=-2.0):
+        if (hole_weight, landing_height_weight, lines_cleared_weight, bumpiness_weight) == self.get_weights():
+            return
         self.hole_weight = hole_weight
         self.landing_height_weight = landing_height_weight
         self.lines_cleared_weight = lines_cleared_weight
         self.bumpiness_weight = bumpiness_weight
+        self.weights_version += 1
+    
+    def set_extended_weights(self, weights):
+        # Weights for FEATURE_NAMES[4:]. Setting them switches the evaluator to
+        # the full feature vector; None goes back to the basic four features.
+        if weights is not None:
+            weights = tuple(float(weight) for weight in weights)
+        if weights == self.extended_weights:
+            return
+        if (weights is None) != (self.extended_weights is None):
+            # Candidates computed so far carry the other evaluator's features.
+            self.position = None
+            if self.cache is not None:
+                self.cache.clear()
+        self.extended_weights = weights
+        self.weights_version += 1
+    
+    def evaluate(self, holes, landing_height, lines_cleared, bumpiness, *extended):
+        score = (self.hole_weight * holes + 
+                 self.landing_height_weight * landing_height +
+                 self.lines_cleared_weight * lines_cleared +
+                 self.bumpiness_weight * bumpiness)
+        if extended:
+            for weight, value in zip(self.extended_weights, extended):
+                score += weight * value
+        return score
     
     def count_holes(self, board):
         holes = 0
@@ -59,35 +194,187 @@ class TetrisAI:
                 lines_cleared += 1
         return lines_cleared
     
-    def simulate_placement(self, game, piece, rotation, x):
-        test_game = copy.deepcopy(game)
-        test_piece = piece.copy()
-        test_piece.rotation = rotation
-        test_piece.x = x
-        test_piece.y = 0
+    def get_placement_features(self, game, piece, rotation, x):
+        return game.get_drop_features(piece, rotation, x)
+    
+    def get_board_context(self, game, rows):
+        # What get_feature_vector adjusts for each placement: the board's own
+        # extended features, a bitmask of the rows holding holes, and the column
+        # bitmasks (bit y for row y, walls as full columns at both ends) with
+        # each column's wells. None if the board has full rows, which only the
+        # full pass handles.
+        totals = self.extract_features(rows, {}, game.BOARD_WIDTH, 0)
+        if totals[2]:
+            return None
+        width = game.BOARD_WIDTH
+        wall = (1 << game.BOARD_HEIGHT) - 1
+        columns = [wall] + [0] * width + [wall]
+        hole_rows = 0
+        covered = 0
+        for y, row in enumerate(rows):
+            covered |= row
+            if covered & ~row:
+                hole_rows |= 1 << y
+            while row:
+                cell = row & -row
+                columns[cell.bit_length()] |= 1 << y
+                row ^= cell
+        wells = []
+        for x in range(width):
+            # Rows above the column's top; an empty column gives -1, every row.
+            column = columns[x + 1]
+            wells.append(well_depths(columns[x] & columns[x + 2] & ((column & -column) - 1)))
+        return totals, hole_rows, columns, wells
+    
+    def get_feature_vector(self, game, piece, rotation, x, rows, context=None):
+        # Like get_placement_features, but returns every FEATURE_NAMES entry;
+        # rows are the board's row bitmasks, shared by all placements.
+        y = game.get_drop_y(piece, rotation, x, 0)
+        if not game.is_valid_position(piece, x - piece.x, y - piece.y, rotation):
+            return None
+        shape_type = piece.shape_type
+        if context is None or y + Tetromino.BOUNDS[shape_type][rotation][2] < 0:
+            return self.extract_placement(game, shape_type, rotation, x, y, rows)
         
-        while test_game.is_valid_position(test_piece, 0, 1):
-            test_piece.move(0, 1)
+        # A piece that clears nothing and rests on the surface of every column
+        # it covers adds two column transitions per column it leaves a gap in,
+        # turns the gaps into holes under its cells, and only changes the row
+        # transitions of its own rows, the bumpiness next to its columns and
+        # the wells of its columns and their neighbours, so the board's totals
+        # are adjusted rather than recounted.
+        totals, hole_rows, columns, wells = context
+        (holes, _, _, _, row_transitions, column_transitions, well_count, _, hole_depth,
+         rows_with_holes) = totals
+        piece_rows, piece_columns, neighbours = get_piece_layout(shape_type, rotation, x, game.BOARD_WIDTH)
+        transitions = get_row_tables(game.BOARD_WIDTH)[0]
+        full = (1 << game.BOARD_WIDTH) - 1
+        for dy, mask in piece_rows:
+            row = rows[y + dy]
+            if row | mask == full:
+                return self.extract_placement(game, shape_type, rotation, x, y, rows)
+            row_transitions += transitions[row | mask] - transitions[row]
         
-        if not test_game.is_valid_position(test_piece):
-            return None
+        height = game.BOARD_HEIGHT
+        heights = game.column_heights
+        new_heights = heights[:]
+        column_holes = game.column_holes
+        columns = columns[:]
+        gap_rows = 0
+        for column, top, bottom, mask in piece_columns:
+            lowest = y + bottom
+            gap = height - heights[column] - lowest - 1
+            if gap < 0:
+                return self.extract_placement(game, shape_type, rotation, x, y, rows)
+            if gap:
+                holes += gap
+                column_transitions += 2
+                gap_rows |= ((1 << gap) - 1) << (lowest + 1)
+            hole_depth += (bottom - top + 1) * (column_holes[column] + gap)
+            new_heights[column] = height - y - top
+            columns[column + 1] |= mask << y
+        if gap_rows:
+            rows_with_holes += (gap_rows & ~hole_rows).bit_count()
         
-        for block_x, block_y in test_piece.get_blocks():
-            if block_y >= 0:
-                test_game.board[block_y][block_x] = 1
+        bumpiness = game.bumpiness
+        for column in neighbours[:-1]:
+            bumpiness += (abs(new_heights[column] - new_heights[column + 1]) -
+                          abs(heights[column] - heights[column + 1]))
+        for column in neighbours:
+            cells = columns[column + 1]
+            walled = columns[column] & columns[column + 2] & ((cells & -cells) - 1)
+            if walled:
+                well_count += well_depths(walled)
+            well_count -= wells[column]
+        return (holes, y, 0, bumpiness, row_transitions, column_transitions, well_count, 0, hole_depth,
+                rows_with_holes)
+    
+    def extract_placement(self, game, shape_type, rotation, x, y, rows):
+        piece_rows = {}
+        for dy, mask in get_piece_layout(shape_type, rotation, x, game.BOARD_WIDTH)[0]:
+            if y + dy >= 0:
+                piece_rows[y + dy] = mask
+        return self.extract_features(rows, piece_rows, game.BOARD_WIDTH, y)
+    
+    def extract_features(self, rows, piece_rows, width, landing_height):
+        # One top-down pass over the row bitmasks with the piece merged in,
+        # handling all columns of a row at once. Holes and bumpiness are taken
+        # before full rows clear, as in placement_features; the other features
+        # describe the board after the clear, so full rows are skipped for them.
+        transitions, walled = get_row_tables(width)
+        height = len(rows)
+        full = (1 << width) - 1
+        column_heights = [0] * width
+        covered = 0
+        holes = 0
+        lines_cleared = 0
+        cleared_cells = 0
         
-        landing_height = test_piece.y
-        holes = self.count_holes(test_game.board)
-        lines_cleared = self.count_lines_cleared(test_game.board)
-        bumpiness = self.calculate_bumpiness(test_game.board)
+        kept = []
+        kept_covered = 0
+        previous = 0
+        column_transitions = 0
+        wells = 0
+        well_runs = []
+        hole_depth = 0
+        rows_with_holes = 0
         
-        score = (self.hole_weight * holes + 
-                self.landing_height_weight * landing_height +
-                self.lines_cleared_weight * lines_cleared +
-                self.bumpiness_weight * bumpiness)
+        # Empty rows above the stack only add their two wall transitions.
+        top = 0
+        while top < height and not rows[top] and top not in piece_rows:
+            top += 1
+        row_transitions = 2 * top
+        
+        for y in range(top, height):
+            piece_row = piece_rows.get(y, 0)
+            row = rows[y] | piece_row
+            fresh = row & ~covered
+            if fresh:
+                covered |= row
+                while fresh:
+                    column = fresh & -fresh
+                    column_heights[column.bit_length() - 1] = height - y
+                    fresh ^= column
+            holes += (covered & ~row).bit_count()
+            if row == full:
+                lines_cleared += 1
+                cleared_cells += piece_row.bit_count()
+                continue
+            
+            row_transitions += transitions[row]
+            column_transitions += (previous ^ row).bit_count()
+            previous = row
+            
+            hole_row = kept_covered & ~row
+            if hole_row:
+                rows_with_holes += 1
+                for above in kept:
+                    hole_depth += (above & hole_row).bit_count()
+            kept.append(row)
+            
+            # well_runs[k] marks the wells that also continue k rows up, so a
+            # well of depth d adds 1 + 2 + ... + d.
+            well_row = walled[row] & ~kept_covered
+            if well_row:
+                well_runs = [well_row] + [run & well_row for run in well_runs if run & well_row]
+                for run in well_runs:
+                    wells += run.bit_count()
+            elif well_runs:
+                well_runs = []
+            kept_covered |= row
+        column_transitions += (previous ^ full).bit_count()
+        # Cleared rows come back as empty rows at the top.
+        row_transitions += 2 * lines_cleared
         
-        return {
-            'score': score,
+        bumpiness = 0
+        for x in range(width - 1):
+            bumpiness += abs(column_heights[x] - column_heights[x + 1])
+        return (holes, landing_height, lines_cleared, bumpiness, row_transitions, column_transitions,
+                wells, lines_cleared * cleared_cells, hole_depth, rows_with_holes)
+    
+    def make_move(self, rotation, x, features):
+        holes, landing_height, lines_cleared, bumpiness = features[:4]
+        move = {
+            'score': self.evaluate(*features),
             'rotation': rotation,
             'x': x,
             'landing_height': landing_height,
@@ -95,21 +382,84 @@ class TetrisAI:
             'lines_cleared': lines_cleared,
             'bumpiness': bumpiness
         }
+        move.update(zip(self.FEATURE_NAMES[4:], features[4:]))
+        return move
     
-    def get_best_move(self, game):
-        best_move = None
-        best_score = float('-inf')
-        
+    def simulate_placement(self, game, piece, rotation, x):
+        features = self.get_placement_features(game, piece, rotation, x)
+        if features is None:
+            return None
+        return self.make_move(rotation, x, features)
+    
+    def get_candidates(self, game, reachable=True):
+        if reachable:
+            placements = get_reachable_placements(game)
+        else:
+            placements = get_placements(game.current_piece.shape_type, game.BOARD_WIDTH)
+        moves = []
+        features = []
         current_piece = game.current_piece
         
-        for rotation in range(len(current_piece.shapes)):
-            for x in range(-2, game.BOARD_WIDTH + 2):
-                result = self.simulate_placement(game, current_piece, rotation, x)
-                if result and result['score'] > best_score:
-                    best_score = result['score']
-                    best_move = result
+        if self.extended_weights is not None:
+            rows = game.get_row_masks()
+            context = self.get_board_context(game, rows)
+            for rotation, x in placements:
+                result = self.get_feature_vector(game, current_piece, rotation, x, rows, context)
+                if result is not None:
+                    moves.append((rotation, x))
+                    features.append(result)
+            return moves, features
+        if self.batch_evaluator is not None:
+            return self.batch_evaluator.get_candidates(game, placements)
+        
+        for rotation, x in placements:
+            result = self.get_placement_features(game, current_piece, rotation, x)
+            if result is not None:
+                moves.append((rotation, x))
+                features.append(result)
+        return moves, features
+    
+    def filter_reachable(self, game, moves, features, ranges=None):
+        # Narrows candidates computed with reachable=False to the current piece.
+        if ranges is None:
+            ranges = get_reachable_ranges(game)
+        indices = filter_reachable(moves, ranges)
+        return [moves[index] for index in indices], [features[index] for index in indices]
+    
+    def choose_move(self, moves, features):
+        if not moves:
+            return None
         
-        return best_move
+        if self.batch_evaluator is not None and self.extended_weights is None:
+            best = self.batch_evaluator.best_index(self, features)
+        else:
+            best = 0
+            best_score = float('-inf')
+            for index, feature in enumerate(features):
+                score = self.evaluate(*feature)
+                if score > best_score:
+                    best_score = score
+                    best = index
+        
+        rotation, x = moves[best]
+        return self.make_move(rotation, x, features[best])
+    
+    def set_position(self, game, moves, features):
+        # Candidates from get_candidates(game, reachable=False). Until the game
+        # deals a new piece, get_best_move only filters them to what the piece
+        # can still reach and re-ranks them with the current weights.
+        self.position = (game, game.current_piece)
+        self.position_candidates = (moves, features)
+    
+    def has_position(self, game):
+        return self.position is not None and self.position[0] is game and self.position[1] is game.current_piece
+    
+    def get_best_move(self, game):
+        if self.cache is not None:
+            return self.cache.get_best_move(self, game)
+        if not self.has_position(game):
+            self.set_position(game, *self.get_candidates(game, reachable=False))
+        return self.choose_move(*self.filter_reachable(game, *self.position_candidates))
     
     def get_move_sequence(self, game, target_rotation, target_x):
         moves = []
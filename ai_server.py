@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_player import TetrisAI
+from batch_evaluator import BatchEvaluator
+from game import TetrisGame
+from headless import percentile
+from lookahead import BeamSearchAI
+from placements import get_reachable_placements
+from replay import ReplaySource
+from tetromino import Tetromino
+
+DEFAULT_PORT = 8765
+# Several row tables are built per board width with 2**width entries.
+MAX_BOARD_WIDTH = 16
+MAX_BOARD_HEIGHT = 64
+
+class RequestError(Exception):
+    pass
+
+def encode_board(game):
+    return [''.join('#' if cell else '.' for cell in row) for row in game.board]
+
+def check_finite(weights):
+    # NaN or infinite weights would rank moves arbitrarily and cannot be
+    # echoed back as JSON.
+    if not all(math.isfinite(weight) for weight in weights):
+        raise RequestError("weights must be finite numbers")
+    return weights
+
+def parse_weights(weights):
+    # A list of the four basic weights, or an object keyed by weight name that
+    # may also carry extended weights.
+    defaults = TetrisAI()
+    if weights is None:
+        return defaults.get_weights(), None
+    if isinstance(weights, list):
+        if len(weights) != len(TetrisAI.WEIGHT_NAMES):
+            raise RequestError(f"expected {len(TetrisAI.WEIGHT_NAMES)} weights, got {len(weights)}")
+        return check_finite(tuple(float(weight) for weight in weights)), None
+    if not isinstance(weights, dict):
+        raise RequestError("weights must be a list or an object")
+    basic = tuple(float(weights.get(name, default)) for name, default in zip(TetrisAI.WEIGHT_NAMES, defaults.get_weights()))
+    extended = None
+    if any(name in weights for name in TetrisAI.EXTENDED_WEIGHT_NAMES):
+        extended = check_finite(tuple(float(weights.get(name, 0.0)) for name in TetrisAI.EXTENDED_WEIGHT_NAMES))
+    return check_finite(basic), extended
+
+def parse_request(request):
+    # Builds the position a request describes: a TetrisGame whose board holds
+    # the request's cells and whose current and next pieces are the ones given.
+    # Its incremental features are left for search() to fill in.
+    board = request.get('board')
+    if not isinstance(board, list) or not board:
+        raise RequestError("board must be a non-empty list of rows")
+    if len(board) > MAX_BOARD_HEIGHT:
+        raise RequestError(f"board must have at most {MAX_BOARD_HEIGHT} rows")
+    rows = []
+    for row in board:
+        if isinstance(row, str):
+            rows.append([0 if cell in '. 0' else 1 for cell in row])
+        else:
+            rows.append([1 if cell else 0 for cell in row])
+    width = len(rows[0])
+    if not 4 <= width <= MAX_BOARD_WIDTH or any(len(row) != width for row in rows):
+        raise RequestError(f"board rows must all have the same width, from 4 to {MAX_BOARD_WIDTH}")
+    
+    # The game only knows these pieces; its preview cycles back to them, so
+    # searching deeper than the next piece would use invented pieces.
+    pieces = [request.get('current'), request.get('next')]
+    if pieces[1] is None:
+        pieces.pop()
+    if any(not isinstance(shape_type, str) or shape_type.upper() not in Tetromino.SHAPE_TYPES for shape_type in pieces):
+        raise RequestError(f"current and next must each be one of {', '.join(Tetromino.SHAPE_TYPES)}")
+    depth = request.get('depth', 1)
+    if depth not in (1, 2) or isinstance(depth, bool):
+        raise RequestError("depth must be 1 or 2")
+    if depth == 2 and len(pieces) < 2:
+        raise RequestError("depth 2 needs the next piece")
+    game = TetrisGame(width, len(rows), ReplaySource(''.join(pieces).upper()))
+    game.board = rows
+    
+    weights, extended_weights = parse_weights(request.get('weights'))
+    return game, weights, extended_weights, int(depth)
+
+class MoveServer:
+    # Requests queue up as they arrive; one batcher takes everything queued,
+    # waiting up to batch_window for more when the queue runs dry, and hands
+    # the batch to a worker thread. Plain requests of one board size are then
+    # evaluated together by BatchEvaluator.get_candidates_many; requests with
+    # extended weights or lookahead are answered one by one.
+    def __init__(self, max_batch=64, batch_window=0.002, stats_window=10000):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.queue = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.evaluator = BatchEvaluator()
+        self.scorer = TetrisAI(backend='numpy')
+        self.searchers = {}
+        
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.compute_time = 0.0
+        self.latencies = deque(maxlen=stats_window)
+    
+    def evaluate_batch(self, requests):
+        start = time.perf_counter()
+        responses = [None] * len(requests)
+        groups = {}
+        for index, request in enumerate(requests):
+            try:
+                game, weights, extended_weights, depth = parse_request(request)
+            except (RequestError, ValueError, TypeError) as error:
+                responses[index] = {'error': str(error)}
+                continue
+            if extended_weights is None and depth == 1:
+                groups.setdefault((game.BOARD_WIDTH, game.BOARD_HEIGHT), []).append((index, game, weights))
+            else:
+                responses[index] = self.search(game, weights, extended_weights, depth)
+        
+        for group in groups.values():
+            games = [game for _, game, _ in group]
+            candidates = self.evaluator.get_candidates_many(games, [get_reachable_placements(game) for game in games])
+            for (index, game, weights), (moves, features) in zip(group, candidates):
+                self.scorer.set_weights(*weights)
+                responses[index] = self.make_response(game, self.scorer, self.scorer.choose_move(moves, features))
+        
+        for request, response in zip(requests, responses):
+            if 'id' in request:
+                response['id'] = request['id']
+        self.compute_time += time.perf_counter() - start
+        return responses
+    
+    def search(self, game, weights, extended_weights, depth):
+        # The incremental features are only needed by the Python evaluator.
+        game.refresh_features()
+        ai = self.searchers.get(depth)
+        if ai is None:
+            ai = TetrisAI() if depth == 1 else BeamSearchAI(depth)
+            self.searchers[depth] = ai
+        ai.set_weights(*weights)
+        ai.set_extended_weights(extended_weights)
+        return self.make_response(game, ai, ai.get_best_move(game))
+    
+    def make_response(self, game, ai, move):
+        if move is None:
+            return {'move': None, 'actions': []}
+        return {'move': move, 'actions': ai.get_move_sequence(game, move['rotation'], move['x'])}
+    
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.empty() and self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            
+            try:
+                responses = await loop.run_in_executor(self.executor, self.evaluate_batch,
+                                                       [request for request, _, _ in batch])
+            except Exception as error:
+                responses = [{'error': f"internal error: {error}"} for _ in batch]
+            self.batches += 1
+            self.batched_requests += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            now = time.perf_counter()
+            for (_, future, received), response in zip(batch, responses):
+                self.requests += 1
+                self.errors += 'error' in response
+                self.latencies.append(now - received)
+                if not future.cancelled():
+                    future.set_result(response)
+    
+    async def handle_client(self, reader, writer):
+        # One JSON object per line in each direction; a connection's requests
+        # are answered in order.
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial
+                except asyncio.LimitOverrunError as error:
+                    await self.discard_line(reader, error.consumed)
+                    line = None
+                if line == b'':
+                    break
+                try:
+                    if line is None:
+                        raise ValueError("line too long")
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as error:
+                    response = {'error': f"bad request: {error}"}
+                else:
+                    if request.get('stats'):
+                        response = self.stats()
+                    else:
+                        future = loop.create_future()
+                        await self.queue.put((request, future, time.perf_counter()))
+                        response = await future
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def discard_line(self, reader, consumed):
+        # Skips the rest of a line longer than the stream limit, a limit's
+        # worth at a time.
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+    
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = list(self.latencies)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch': self.batched_requests / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'requests_per_sec': self.requests / elapsed if elapsed > 0 else 0.0,
+            'compute_per_request_ms': 1000 * self.compute_time / self.requests if self.requests else 0.0,
+            'latency_p50_ms': 1000 * percentile(latencies, 0.5),
+            'latency_p99_ms': 1000 * percentile(latencies, 0.99),
+            'uptime': elapsed
+        }
+    
+    def format_stats(self):
+        stats = self.stats()
+        return (f"{stats['requests']} requests ({stats['errors']} errors) in {stats['batches']} batches, "
+                f"mean batch {stats['mean_batch']:.1f}, {stats['requests_per_sec']:.0f} req/s, "
+                f"latency p50 {stats['latency_p50_ms']:.2f} ms, p99 {stats['latency_p99_ms']:.2f} ms")
+    
+    async def report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.format_stats(), flush=True)
+    
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, unix_path=None, stats_interval=0):
+        self.queue = asyncio.Queue()
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        tasks = [asyncio.create_task(self.run_batches())]
+        if stats_interval > 0:
+            tasks.append(asyncio.create_task(self.report(stats_interval)))
+        address = unix_path or ':'.join(str(part) for part in server.sockets[0].getsockname()[:2])
+        print(f"Serving moves on {address}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve AI move suggestions as line-delimited JSON over a local socket.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--batch-window', type=float, default=0.002,
+                        help="seconds to wait for more requests before evaluating a partial batch")
+    parser.add_argument('--stats-interval', type=float, default=10.0, help="seconds between stats lines, 0 for none")
+    args = parser.parse_args()
+    
+    server = MoveServer(args.max_batch, args.batch_window)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    print(server.format_stats())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+import numpy as np
+from placements import get_placements
+from tetromino import Tetromino
+
+class BatchEvaluator:
+    def __init__(self):
+        self.move_tables = {}
+    
+    def get_moves(self, shape_type, board_width):
+        key = (shape_type, board_width)
+        if key not in self.move_tables:
+            moves = get_placements(shape_type, board_width)
+            cells = np.array([[(x + dx, dy) for dx, dy in Tetromino.BLOCKS[shape_type][rotation]]
+                              for rotation, x in moves], dtype=np.intp)
+            positions = {move: index for index, move in enumerate(moves)}
+            self.move_tables[key] = (moves, cells[:, :, 0], cells[:, :, 1], positions)
+        return self.move_tables[key]
+    
+    def drop(self, board, cols, rows):
+        height = board.shape[0]
+        padded = np.ones((height + 5, board.shape[1]), dtype=bool)
+        padded[:height] = board
+        
+        offsets = np.arange(height + 1)[:, None, None]
+        valid = ~padded[offsets + rows[None], cols[None]].any(axis=2)
+        landing = np.argmax(~valid[1:], axis=0)
+        legal = valid[landing, np.arange(cols.shape[0])]
+        return landing, legal
+    
+    def place(self, board, cols, rows, landing):
+        boards = np.repeat(board[None], cols.shape[0], axis=0)
+        candidate = np.arange(cols.shape[0])[:, None]
+        boards[candidate, landing[:, None] + rows, cols] = True
+        return boards
+    
+    def features(self, boards):
+        height = boards.shape[1]
+        covered = np.logical_or.accumulate(boards, axis=1)
+        holes = (covered & ~boards).sum(axis=(1, 2))
+        
+        heights = np.where(covered[:, -1, :], height - boards.argmax(axis=1), 0)
+        bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+        lines_cleared = boards.all(axis=2).sum(axis=1)
+        return holes, lines_cleared, bumpiness
+    
+    def get_candidates(self, game, placements=None):
+        board = np.array(game.board, dtype=bool)
+        moves, cols, rows, positions = self.get_moves(game.current_piece.shape_type, game.BOARD_WIDTH)
+        if placements is not None:
+            subset = np.array([positions[move] for move in placements], dtype=np.intp)
+            moves = placements
+            cols = cols[subset]
+            rows = rows[subset]
+        if not len(moves):
+            return [], []
+        
+        landing, legal = self.drop(board, cols, rows)
+        indices = np.flatnonzero(legal)
+        if not len(indices):
+            return [], []
+        cols = cols[indices]
+        rows = rows[indices]
+        landing = landing[indices]
+        
+        holes, lines_cleared, bumpiness = self.features(self.place(board, cols, rows, landing))
+        features = np.stack((holes, landing, lines_cleared, bumpiness), axis=1)
+        return [moves[index] for index in indices], [tuple(row) for row in features.tolist()]
+    
+    def get_candidates_many(self, games, placements):
+        # get_candidates for several positions of the same board size in one
+        # pass: every game's placements are dropped, placed and measured
+        # together, each candidate indexing its own board through `owners`.
+        boards = np.array([game.board for game in games], dtype=bool)
+        height = boards.shape[1]
+        move_lists = []
+        owners = []
+        all_cols = []
+        all_rows = []
+        for index, (game, subset) in enumerate(zip(games, placements)):
+            _, cols, rows, positions = self.get_moves(game.current_piece.shape_type, game.BOARD_WIDTH)
+            picked = np.array([positions[move] for move in subset], dtype=np.intp)
+            move_lists.append(list(subset))
+            owners.append(np.full(len(subset), index, dtype=np.intp))
+            all_cols.append(cols[picked].reshape(-1, 4))
+            all_rows.append(rows[picked].reshape(-1, 4))
+        owners = np.concatenate(owners)
+        cols = np.concatenate(all_cols)
+        rows = np.concatenate(all_rows)
+        results = [([], []) for _ in games]
+        if not len(owners):
+            return results
+        
+        padded = np.ones((len(games), height + 5, boards.shape[2]), dtype=bool)
+        padded[:, :height] = boards
+        offsets = np.arange(height + 1)[:, None, None]
+        valid = ~padded[owners[None, :, None], offsets + rows[None], cols[None]].any(axis=2)
+        landing = np.argmax(~valid[1:], axis=0)
+        legal = valid[landing, np.arange(len(owners))]
+        
+        indices = np.flatnonzero(legal)
+        cols = cols[indices]
+        rows = rows[indices]
+        landing = landing[indices]
+        placed = boards[owners[indices]]
+        placed[np.arange(len(indices))[:, None], landing[:, None] + rows, cols] = True
+        holes, lines_cleared, bumpiness = self.features(placed)
+        features = np.stack((holes, landing, lines_cleared, bumpiness), axis=1).tolist()
+        
+        # Candidates are grouped by game, so each game's survivors are a run.
+        starts = np.cumsum([0] + [len(moves) for moves in move_lists])
+        for offset, index, row in zip(indices.tolist(), owners[indices].tolist(), features):
+            moves, vectors = results[index]
+            moves.append(move_lists[index][offset - starts[index]])
+            vectors.append(tuple(row))
+        return results
+    
+    def best_index(self, ai, features):
+        features = np.asarray(features, dtype=np.float64)
+        scores = (ai.hole_weight * features[:, 0] +
+                  ai.landing_height_weight * features[:, 1] +
+                  ai.lines_cleared_weight * features[:, 2] +
+                  ai.bumpiness_weight * features[:, 3])
+        return int(np.argmax(scores))
\ No newline at end of file
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from piece_generator import UniformGenerator
+
+def run_engine(engine_cls, pieces, seed, weights=None):
+    # The path headless games take: score every placement of the current
+    # piece with TetrisAI, then apply the best one.
+    game = engine_cls(piece_source=UniformGenerator(seed))
+    ai = TetrisAI()
+    if weights is not None:
+        ai.set_weights(*weights)
+    games = 1
+    lines = 0
+    
+    start = time.perf_counter()
+    for _ in range(pieces):
+        move = ai.get_best_move(game)
+        if move is None or not game.apply_placement(move['rotation'], move['x']) or game.game_over:
+            lines += game.lines_cleared
+            game.reset_game()
+            games += 1
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'elapsed': elapsed,
+        'placements_per_sec': pieces / elapsed,
+        'games': games,
+        'lines': lines + game.lines_cleared,
+        'board': [row[:] for row in game.board]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare AI placement throughput of the board engines on the same piece sequence.")
+    parser.add_argument('--pieces', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--weights', type=float, nargs=4, metavar=('HOLES', 'LANDING_HEIGHT', 'LINES', 'BUMPINESS'))
+    args = parser.parse_args()
+    
+    results = {}
+    for name, engine_cls in GAME_ENGINES.items():
+        results[name] = run_engine(engine_cls, args.pieces, args.seed, args.weights)
+        result = results[name]
+        print(f"{name:>8}: {result['placements_per_sec']:10.1f} placements/s  "
+              f"({result['games']} games, {result['lines']} lines, {result['elapsed']:.2f}s)")
+    
+    speedup = results['bitboard']['placements_per_sec'] / results['list']['placements_per_sec']
+    print(f"bitboard speedup: {speedup:.2f}x")
+    if (results['bitboard']['board'], results['bitboard']['lines']) != (results['list']['board'], results['list']['lines']):
+        print("WARNING: engines diverged on the same piece sequence")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
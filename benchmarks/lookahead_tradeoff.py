@@ -0,0 +1,27 @@
+import argparse
+
+from ai_player import TetrisAI
+from headless import HeadlessRunner, percentile, summarize
+
+def main():
+    parser = argparse.ArgumentParser(description="Report decision latency against lines cleared for lookahead settings.")
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-pieces', type=int, default=500)
+    parser.add_argument('--beam-widths', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--time-budget', type=float, default=None)
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    args = parser.parse_args()
+    
+    settings = [(1, 0)] + [(2, width) for width in args.beam_widths]
+    print(f"{'depth':>5} {'beam':>5} {'mean lines':>11} {'p50 ms':>8} {'p99 ms':>8} {'pieces/s':>9}")
+    for depth, beam_width in settings:
+        runner = HeadlessRunner(max_pieces=args.max_pieces, backend=args.backend,
+                                depth=depth, beam_width=beam_width, time_budget=args.time_budget)
+        summary = summarize(list(runner.run(args.games, args.seed)))
+        print(f"{depth:>5} {beam_width:>5} {summary['mean_lines']:>11.1f} "
+              f"{percentile(runner.latencies, 0.5) * 1000:>8.2f} {percentile(runner.latencies, 0.99) * 1000:>8.2f} "
+              f"{summary['pieces_per_sec']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,454 @@
+import argparse
+import copy
+import random
+import sys
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from game import TetrisGame
+from lookahead import BeamSearchAI
+from placements import get_reachable_placements
+from tetromino import Tetromino
+from piece_generator import SequenceGenerator
+from transposition import MIRROR_PARTNERS
+from vec_env import VecTetrisEnv
+
+class ReferenceTetrisAI(TetrisAI):
+    def is_reachable(self, game, rotation, x):
+        test_game = game.snapshot()
+        for action in self.get_move_sequence(test_game, rotation, x)[:-1]:
+            if action == 'rotate':
+                test_game.rotate_piece()
+            else:
+                test_game.move_piece(-1 if action == 'left' else 1, 0)
+        piece = test_game.current_piece
+        return test_game.is_valid_position(piece) and (piece.rotation, piece.x) == (rotation, x)
+    
+    def get_best_move(self, game):
+        # A piece that spawns overlapping the stack ends the game: no moves.
+        best = None
+        if not game.is_valid_position(game.current_piece):
+            return None
+        for rotation in range(len(game.current_piece.shapes)):
+            for x in range(-2, game.BOARD_WIDTH + 2):
+                if not self.is_reachable(game, rotation, x):
+                    continue
+                move = self.simulate_placement(game, game.current_piece, rotation, x)
+                if move is not None and (best is None or move['score'] > best['score']):
+                    best = move
+        return best
+    
+    def simulate_placement(self, game, piece, rotation, x):
+        test_game = copy.deepcopy(game)
+        test_piece = piece.copy()
+        test_piece.rotation = rotation
+        test_piece.x = x
+        test_piece.y = 0
+        
+        while test_game.is_valid_position(test_piece, 0, 1):
+            test_piece.move(0, 1)
+        
+        if not test_game.is_valid_position(test_piece):
+            return None
+        
+        for block_x, block_y in test_piece.get_blocks():
+            if block_y >= 0:
+                test_game.board[block_y][block_x] = 1
+        
+        landing_height = test_piece.y
+        holes = self.count_holes(test_game.board)
+        lines_cleared = self.count_lines_cleared(test_game.board)
+        bumpiness = self.calculate_bumpiness(test_game.board)
+        
+        score = (self.hole_weight * holes + 
+                self.landing_height_weight * landing_height +
+                self.lines_cleared_weight * lines_cleared +
+                self.bumpiness_weight * bumpiness)
+        
+        return {
+            'score': score,
+            'rotation': rotation,
+            'x': x,
+            'landing_height': landing_height,
+            'holes': holes,
+            'lines_cleared': lines_cleared,
+            'bumpiness': bumpiness
+        }
+    
+    def reference_feature_vector(self, game, piece, rotation, x):
+        test_piece = piece.copy()
+        test_piece.rotation = rotation
+        test_piece.x = x
+        test_piece.y = 0
+        while game.is_valid_position(test_piece, 0, 1):
+            test_piece.move(0, 1)
+        if not game.is_valid_position(test_piece):
+            return None
+        
+        board = [row[:] for row in game.board]
+        cells = [(block_x, block_y) for block_x, block_y in test_piece.get_blocks() if block_y >= 0]
+        for block_x, block_y in cells:
+            board[block_y][block_x] = 1
+        width = game.BOARD_WIDTH
+        full_rows = [y for y, row in enumerate(board) if all(row)]
+        eroded_cells = len(full_rows) * sum(1 for _, block_y in cells if block_y in full_rows)
+        cleared = [[0] * width for _ in full_rows] + [row for y, row in enumerate(board) if y not in full_rows]
+        
+        row_transitions = 0
+        for row in cleared:
+            framed = [1] + row + [1]
+            row_transitions += sum(1 for left, right in zip(framed, framed[1:]) if bool(left) != bool(right))
+        column_transitions = 0
+        wells = 0
+        hole_depth = 0
+        hole_rows = set()
+        for column in range(width):
+            cells_down = [0] + [row[column] for row in cleared] + [1]
+            column_transitions += sum(1 for top, bottom in zip(cells_down, cells_down[1:]) if bool(top) != bool(bottom))
+            filled = 0
+            depth = 0
+            for y, row in enumerate(cleared):
+                if row[column]:
+                    filled += 1
+                    depth = 0
+                elif filled:
+                    hole_depth += filled
+                    hole_rows.add(y)
+                    depth = 0
+                elif (column == 0 or row[column - 1]) and (column == width - 1 or row[column + 1]):
+                    depth += 1
+                    wells += depth
+                else:
+                    depth = 0
+        
+        return (self.count_holes(board), test_piece.y, len(full_rows), self.calculate_bumpiness(board),
+                row_transitions, column_transitions, wells, eroded_cells, hole_depth, len(hole_rows))
+
+def random_weights(rng):
+    return [round(rng.uniform(-10, 10), 1) for _ in range(4)]
+
+def random_position(rng):
+    game = TetrisGame()
+    for _ in range(rng.randint(0, 60)):
+        piece = game.current_piece
+        piece.rotation = rng.randrange(len(piece.shapes))
+        piece.x = rng.randint(-2, game.BOARD_WIDTH + 1)
+        if game.is_valid_position(piece):
+            game.hard_drop()
+        if game.game_over:
+            game.reset_game()
+    
+    for _ in range(rng.randint(0, 8)):
+        x = rng.randrange(game.BOARD_WIDTH)
+        y = rng.randrange(game.BOARD_HEIGHT)
+        game.board[y][x] = 1 - game.board[y][x]
+    lines = game.get_complete_lines()
+    if lines:
+        game.clear_lines(lines)
+    game.refresh_features()
+    
+    game.current_piece = Tetromino(rng.choice(Tetromino.SHAPE_TYPES))
+    # Some positions catch the piece mid-fall, away from its spawn point.
+    if rng.random() < 0.3:
+        for _ in range(rng.randint(1, 6)):
+            action = rng.randrange(3)
+            if action == 0:
+                game.rotate_piece()
+            else:
+                game.move_piece(rng.choice([-1, 1]) if action == 1 else 0, 1 if action == 2 else 0)
+    return game
+
+def check_simulation(positions, seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        weights = random_weights(rng)
+        ai = TetrisAI()
+        reference = ReferenceTetrisAI()
+        ai.set_weights(*weights)
+        reference.set_weights(*weights)
+        
+        board_before = [row[:] for row in game.board]
+        expected = reference.get_best_move(game)
+        actual = ai.get_best_move(game)
+        # The bitboard engine scores placements from its row masks.
+        bitboard = GAME_ENGINES['bitboard']()
+        bitboard.board = [row[:] for row in game.board]
+        bitboard.refresh_features()
+        bitboard.current_piece = game.current_piece
+        candidates = ai.get_candidates(game, reachable=False)
+        if (actual != expected or game.board != board_before or ai.get_best_move(bitboard) != expected
+                or ai.get_candidates(bitboard, reachable=False) != candidates):
+            mismatches += 1
+            print(f"simulation mismatch at position {index}: expected {expected}, got {actual}")
+    return mismatches
+
+def check_numpy_backend(positions, seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        weights = random_weights(rng)
+        ai = TetrisAI()
+        batched = TetrisAI(backend='numpy')
+        ai.set_weights(*weights)
+        batched.set_weights(*weights)
+        
+        expected = ai.get_best_move(game)
+        actual = batched.get_best_move(game)
+        if actual != expected:
+            mismatches += 1
+            print(f"numpy backend mismatch at position {index}: expected {expected}, got {actual}")
+    return mismatches
+
+def check_incremental_features(positions, seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    ai = TetrisAI()
+    mismatches = 0
+    for index in range(positions):
+        game = GAME_ENGINES[rng.choice(sorted(GAME_ENGINES))]()
+        for _ in range(rng.randint(1, 80)):
+            piece = game.current_piece
+            move = ai.get_best_move(game) if rng.random() < 0.5 else None
+            if move is not None:
+                game.apply_placement(move['rotation'], move['x'])
+            elif not game.apply_placement(rng.randrange(len(piece.shapes)), rng.randint(-2, game.BOARD_WIDTH + 1)):
+                continue
+            if game.game_over:
+                break
+        
+        expected = (ai.get_column_heights(game.board), ai.count_holes(game.board), ai.calculate_bumpiness(game.board))
+        actual = (game.column_heights, game.holes, game.bumpiness)
+        row_fill = [sum(1 for cell in row if cell != 0) for row in game.board]
+        row_masks = TetrisGame.get_row_masks(game)
+        if (actual != expected or game.row_fill != row_fill or sum(game.column_holes) != game.holes
+                or game.get_row_masks() != row_masks):
+            mismatches += 1
+            print(f"feature mismatch at position {index}: expected {expected}, got {actual}")
+    return mismatches
+
+def check_extended_features(positions, seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    reference = ReferenceTetrisAI()
+    mismatches = 0
+    for index in range(positions):
+        game = GAME_ENGINES[rng.choice(sorted(GAME_ENGINES))]()
+        source = random_position(rng)
+        for y, row in enumerate(source.board):
+            for x, cell in enumerate(row):
+                if cell:
+                    game.board[y][x] = 1
+        game.refresh_features()
+        game.current_piece = source.current_piece
+        
+        ai = TetrisAI(backend=rng.choice(TetrisAI.BACKENDS))
+        ai.set_weights(*random_weights(rng))
+        ai.set_extended_weights([round(rng.uniform(-10, 10), 1) for _ in TetrisAI.EXTENDED_WEIGHT_NAMES])
+        moves, features = ai.get_candidates(game, reachable=False)
+        expected = {}
+        for rotation in range(len(game.current_piece.shapes)):
+            for x in range(-2, game.BOARD_WIDTH + 2):
+                vector = reference.reference_feature_vector(game, game.current_piece, rotation, x)
+                if vector is not None:
+                    expected[(rotation, x)] = vector
+        actual = dict(zip(moves, features))
+        if any(expected.get(move) != vector for move, vector in actual.items()) or bool(actual) != bool(expected):
+            mismatches += 1
+            print(f"extended feature mismatch at position {index}: expected {expected}, got {actual}")
+    return mismatches
+
+def check_rerank(positions, seed):
+    # Candidates kept for a position and re-ranked after a weight change must
+    # pick the same move as a fresh search with the new weights.
+    rng = random.Random(seed)
+    random.seed(seed)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        ai = TetrisAI(backend=rng.choice(TetrisAI.BACKENDS))
+        ai.set_weights(*random_weights(rng))
+        ai.get_best_move(game)
+        weights = random_weights(rng)
+        ai.set_weights(*weights)
+        if rng.random() < 0.5:
+            game.move_piece(rng.choice([-1, 1]), 1)
+        
+        fresh = TetrisAI(backend=ai.backend)
+        fresh.set_weights(*weights)
+        expected = fresh.get_best_move(game)
+        actual = ai.get_best_move(game)
+        if actual != expected or not ai.has_position(game):
+            mismatches += 1
+            print(f"rerank mismatch at position {index}: expected {expected}, got {actual}")
+    return mismatches
+
+def check_lookahead(positions, seed):
+    # The first move of a lookahead search must be one the live piece can
+    # still reach from where it is, like a one-ply search's.
+    rng = random.Random(seed)
+    random.seed(seed)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        ai = BeamSearchAI(2, rng.randint(1, 8), cache_size=rng.choice([0, 256]))
+        ai.set_weights(*random_weights(rng))
+        reachable = get_reachable_placements(game)
+        move = ai.get_best_move(game)
+        actual = None if move is None else (move['rotation'], move['x'])
+        if (actual is None) != (not reachable) or (actual is not None and actual not in reachable):
+            mismatches += 1
+            print(f"lookahead mismatch at position {index}: {actual} not in {reachable}")
+    return mismatches
+
+def mirror_position(game):
+    mirrored = TetrisGame()
+    mirrored.board = [row[::-1] for row in game.board]
+    mirrored.refresh_features()
+    mirrored.current_piece = Tetromino(MIRROR_PARTNERS[game.current_piece.shape_type])
+    return mirrored
+
+def check_cache(positions, seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    cached = TetrisAI(cache_size=512)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        if rng.random() < 0.3:
+            cached.set_weights(*random_weights(rng))
+        plain = TetrisAI()
+        plain.set_weights(*cached.get_weights())
+        
+        for position in (game, mirror_position(game), game):
+            expected = plain.get_best_move(position)
+            actual = cached.get_best_move(position)
+            if actual != expected:
+                mismatches += 1
+                print(f"cache mismatch at position {index}: expected {expected}, got {actual}")
+                break
+    print(f"cache stats: {cached.cache.stats()}")
+    return mismatches
+
+def check_vec_env(positions, seed):
+    # Games in lockstep against TetrisGame fed the same piece queues; every
+    # step must agree on legality, board, score, level and game over.
+    rng = random.Random(seed)
+    ai = TetrisAI()
+    mismatches = 0
+    for batch_start in range(0, positions, 50):
+        count = min(50, positions - batch_start)
+        env = VecTetrisEnv(count, seed=seed + batch_start, pieces=rng.choice(['uniform', 'bag']))
+        pieces = [''.join(Tetromino.SHAPE_TYPES[index] for index in row) for row in env.queue]
+        env.set_queue(env.queue)
+        env.reset()
+        games = [TetrisGame(piece_source=SequenceGenerator(sequence)) for sequence in pieces]
+        failed = [False] * count
+        for _ in range(rng.randint(1, 150)):
+            rotations = []
+            xs = []
+            expected_valid = []
+            for game in games:
+                if game.game_over:
+                    rotations.append(-1)
+                    xs.append(0)
+                    expected_valid.append(False)
+                    continue
+                move = ai.get_best_move(game) if rng.random() < 0.7 else None
+                if move is not None:
+                    rotation, x = move['rotation'], move['x']
+                else:
+                    rotation, x = rng.randrange(len(game.current_piece.shapes)), rng.randint(-2, game.BOARD_WIDTH + 1)
+                rotations.append(rotation)
+                xs.append(x)
+                expected_valid.append(game.apply_placement(rotation, x))
+            
+            _, _, _, valid = env.step(rotations, xs)
+            for index, game in enumerate(games):
+                if failed[index]:
+                    continue
+                expected = (expected_valid[index], game.board, game.score, game.lines_cleared, game.level,
+                            game.game_over, game.current_piece.shape_type, game.next_piece.shape_type)
+                actual = (bool(valid[index]), env.boards[index].astype(int).tolist(), int(env.score[index]),
+                          int(env.lines[index]), int(env.level[index]), bool(env.game_over[index]),
+                          Tetromino.SHAPE_TYPES[env.current[index]], Tetromino.SHAPE_TYPES[env.next[index]])
+                if actual != expected:
+                    failed[index] = True
+                    print(f"vec env mismatch in game {batch_start + index}: expected {expected[2:]}, got {actual[2:]}")
+        mismatches += sum(failed)
+    return mismatches
+
+def check_drop(positions, seed):
+    # Closed-form landing rows against falling one row at a time, from every
+    # start: above the stack, under overhangs, overlapping and off the board.
+    rng = random.Random(seed)
+    random.seed(seed)
+    mismatches = 0
+    for index in range(positions):
+        game = random_position(rng)
+        if rng.random() < 0.5:
+            engine = GAME_ENGINES['bitboard']()
+            engine.board = game.board
+            engine.refresh_features()
+            engine.current_piece = game.current_piece
+            game = engine
+        
+        piece = game.current_piece
+        failed = None
+        for rotation in range(len(piece.shapes)):
+            for x in range(-2, game.BOARD_WIDTH + 2):
+                for y in range(0, game.BOARD_HEIGHT, rng.choice([1, 3])):
+                    probe = piece.copy()
+                    probe.rotation = rotation
+                    probe.x = x
+                    probe.y = y
+                    expected = probe.y
+                    while game.is_valid_position(probe, 0, expected - probe.y + 1):
+                        expected += 1
+                    actual = game.get_drop_y(piece, rotation, x, y)
+                    if actual != expected and failed is None:
+                        failed = (rotation, x, y, expected, actual)
+        
+        ghost = game.get_ghost_piece()
+        stepped = game.current_piece.copy()
+        while game.is_valid_position(stepped, 0, 1):
+            stepped.move(0, 1)
+        if failed is None and ghost.y != stepped.y:
+            failed = ('ghost', stepped.y, ghost.y)
+        if failed is not None:
+            mismatches += 1
+            print(f"drop mismatch at position {index}: {failed}")
+    return mismatches
+
+CHECKS = {
+    'simulation': check_simulation,
+    'numpy': check_numpy_backend,
+    'features': check_incremental_features,
+    'extended': check_extended_features,
+    'cache': check_cache,
+    'rerank': check_rerank,
+    'lookahead': check_lookahead,
+    'drop': check_drop,
+    'vec_env': check_vec_env
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential checks of the AI and engine fast paths against reference implementations.")
+    parser.add_argument('--positions', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', choices=sorted(CHECKS), action='append')
+    args = parser.parse_args()
+    
+    failed = False
+    for name in args.check or list(CHECKS):
+        mismatches = CHECKS[name](args.positions, args.seed)
+        print(f"{name}: {args.positions - mismatches}/{args.positions} positions match")
+        failed = failed or mismatches > 0
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from ai_player import TetrisAI
+from ai_server import DEFAULT_PORT, encode_board
+from benchmarks.suite import sample_positions
+from headless import percentile
+
+def make_requests(count, positions, seed):
+    # Realistic boards from AI play, each with its own random weights so the
+    # server cannot share one scoring across a batch.
+    rng = random.Random(seed)
+    games = sample_positions('list', (10, 20), None, seed, positions)
+    requests = []
+    for index in range(count):
+        game = games[index % len(games)]
+        weights = [round(rng.uniform(-10, 0), 2), round(rng.uniform(-2, 2), 2),
+                   round(rng.uniform(0, 10), 2), round(rng.uniform(-5, 0), 2)]
+        requests.append({
+            'id': index,
+            'board': encode_board(game),
+            'current': game.current_piece.shape_type,
+            'next': game.next_piece.shape_type,
+            'weights': weights
+        })
+    return requests, games
+
+async def open_connection(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+async def wait_for_server(args, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await open_connection(args)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+            continue
+        writer.close()
+        return
+
+async def call(reader, writer, request):
+    writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+async def run_load(args, requests):
+    # `concurrency` connections, each sending its next request as soon as the
+    # previous answer arrives.
+    responses = [None] * len(requests)
+    latencies = []
+    next_request = iter(range(len(requests)))
+    
+    async def client():
+        reader, writer = await open_connection(args)
+        for index in next_request:
+            start = time.perf_counter()
+            responses[index] = await call(reader, writer, requests[index])
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    reader, writer = await open_connection(args)
+    stats = await call(reader, writer, {'stats': True})
+    writer.close()
+    return responses, latencies, elapsed, stats
+
+def verify(requests, games, responses):
+    ai = TetrisAI(backend='numpy')
+    mismatches = 0
+    for request, response in zip(requests, responses):
+        ai.set_weights(*request['weights'])
+        expected = ai.get_best_move(games[request['id'] % len(games)])
+        if response.get('id') != request['id'] or response.get('move') != expected:
+            mismatches += 1
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test ai_server.py with concurrent clients and report latency and throughput.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="connect to this Unix socket path instead of TCP")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="start a server for the run and stop it afterwards")
+    parser.add_argument('--max-batch', type=int, default=64, help="server setting when spawning")
+    parser.add_argument('--batch-window', type=float, default=0.002, help="server setting when spawning")
+    parser.add_argument('--verify', action='store_true', help="compare every answer with a local TetrisAI")
+    args = parser.parse_args()
+    
+    requests, games = make_requests(args.requests, args.positions, args.seed)
+    server = None
+    if args.spawn:
+        command = [sys.executable, 'ai_server.py', '--max-batch', str(args.max_batch),
+                   '--batch-window', str(args.batch_window), '--stats-interval', '0']
+        command += ['--unix', args.unix] if args.unix else ['--host', args.host, '--port', str(args.port)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_for_server(args))
+        responses, latencies, elapsed, stats = asyncio.run(run_load(args, requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    
+    errors = sum(1 for response in responses if 'error' in response)
+    print(f"{len(requests)} requests over {args.concurrency} connections in {elapsed:.2f}s: "
+          f"{len(requests) / elapsed:.0f} req/s, {errors} errors")
+    print(f"client latency: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+    print(f"server: mean batch {stats['mean_batch']:.1f} (largest {stats['largest_batch']}), "
+          f"compute {stats['compute_per_request_ms']:.3f} ms/request, "
+          f"latency p50 {stats['latency_p50_ms']:.2f} ms, p99 {stats['latency_p99_ms']:.2f} ms")
+    if args.verify:
+        mismatches = verify(requests, games, responses)
+        print(f"verify: {len(requests) - mismatches}/{len(requests)} answers match TetrisAI")
+        sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
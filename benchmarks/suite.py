@@ -0,0 +1,234 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from headless import HeadlessRunner, percentile, summarize
+from piece_generator import UniformGenerator
+from tetromino import Tetromino
+
+DISTRIBUTIONS = {
+    'uniform': {},
+    'sz-heavy': {'S': 3, 'Z': 3},
+    'no-i': {'I': 0}
+}
+
+def parse_board(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def parse_distribution(text):
+    if text in DISTRIBUTIONS:
+        overrides = DISTRIBUTIONS[text]
+    else:
+        overrides = {}
+        for part in text.split(','):
+            shape_type, weight = part.split('=')
+            overrides[shape_type.strip().upper()] = float(weight)
+    return [overrides.get(shape_type, 1) for shape_type in Tetromino.SHAPE_TYPES]
+
+def make_game(engine, board, weights, seed):
+    width, height = board
+    return GAME_ENGINES[engine](width, height, UniformGenerator(seed, weights))
+
+def sample_positions(engine, board, weights, seed, count):
+    # Positions reached by letting the default AI play, so boards have
+    # realistic surfaces rather than random noise.
+    ai = TetrisAI()
+    game = make_game(engine, board, weights, seed)
+    positions = []
+    while len(positions) < count:
+        move = ai.get_best_move(game)
+        if move is None or not game.apply_placement(move['rotation'], move['x']) or game.game_over:
+            game = make_game(engine, board, weights, seed + len(positions) + 1)
+            continue
+        positions.append(game.snapshot())
+    return positions
+
+def time_calls(function, calls, min_time):
+    total_calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(calls):
+            function()
+        total_calls += calls
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return total_calls / elapsed
+
+def bench_get_blocks(min_time):
+    pieces = []
+    for shape_type in Tetromino.SHAPE_TYPES:
+        for rotation in range(len(Tetromino.SHAPES[shape_type])):
+            piece = Tetromino(shape_type)
+            piece.rotation = rotation
+            pieces.append(piece)
+    
+    def run():
+        for piece in pieces:
+            piece.get_blocks()
+    return time_calls(run, 100, min_time) * len(pieces)
+
+def bench_is_valid_position(positions, min_time):
+    probes = []
+    for game in positions[:50]:
+        piece = game.current_piece
+        for rotation in range(len(piece.shapes)):
+            for x in range(-2, game.BOARD_WIDTH + 2):
+                for y in range(0, game.BOARD_HEIGHT, 3):
+                    probe = piece.copy()
+                    probe.rotation = rotation
+                    probe.x = x
+                    probe.y = y
+                    probes.append((game, probe))
+    
+    def run():
+        for game, probe in probes:
+            game.is_valid_position(probe)
+    return time_calls(run, 1, min_time) * len(probes)
+
+def bench_place_piece(positions, min_time):
+    ai = TetrisAI()
+    placements = []
+    for game in positions:
+        move = ai.get_best_move(game)
+        if move is None:
+            continue
+        piece = game.current_piece.copy()
+        piece.rotation = move['rotation']
+        piece.x = move['x']
+        piece.y = move['landing_height']
+        placements.append((game, piece))
+    
+    placed = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        games = [(game.snapshot(), piece) for game, piece in placements]
+        start = time.perf_counter()
+        for game, piece in games:
+            game.place_piece(piece)
+        elapsed += time.perf_counter() - start
+        placed += len(games)
+    return placed / elapsed
+
+def bench_simulate_placement(positions, min_time):
+    ai = TetrisAI()
+    calls = [(game, rotation, x)
+             for game in positions[:50]
+             for rotation in range(len(game.current_piece.shapes))
+             for x in range(-2, game.BOARD_WIDTH + 2)]
+    
+    def run():
+        for game, rotation, x in calls:
+            ai.simulate_placement(game, game.current_piece, rotation, x)
+    return time_calls(run, 1, min_time) * len(calls)
+
+def bench_best_move_latency(positions, backend):
+    ai = TetrisAI(backend)
+    latencies = []
+    for game in positions:
+        start = time.perf_counter()
+        ai.get_best_move(game)
+        latencies.append(time.perf_counter() - start)
+    return percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+
+def bench_games(engine, board, weights, seed, games, max_pieces, backend):
+    runner = HeadlessRunner(engine=engine, max_pieces=max_pieces, backend=backend)
+    results = []
+    for index in range(games):
+        game = make_game(engine, board, weights, seed + index)
+        results.append(runner.play_game(game))
+    summary = summarize(results)
+    return summary['games_per_sec'], summary['pieces_per_sec'], summary['mean_lines']
+
+def run_suite(engine, board, distribution, seed, positions_count, games, max_pieces, min_time):
+    weights = parse_distribution(distribution)
+    positions = sample_positions(engine, board, weights, seed, positions_count)
+    metrics = {}
+    
+    def record(name, value, better):
+        metrics[name] = {'value': value, 'better': better}
+    
+    record('get_blocks_per_sec', bench_get_blocks(min_time), 'higher')
+    record('is_valid_position_per_sec', bench_is_valid_position(positions, min_time), 'higher')
+    record('place_piece_per_sec', bench_place_piece(positions, min_time), 'higher')
+    record('simulate_placement_per_sec', bench_simulate_placement(positions, min_time), 'higher')
+    for backend in TetrisAI.BACKENDS:
+        p50, p99 = bench_best_move_latency(positions, backend)
+        record(f'get_best_move_{backend}_p50_ms', p50, 'lower')
+        record(f'get_best_move_{backend}_p99_ms', p99, 'lower')
+    games_per_sec, pieces_per_sec, mean_lines = bench_games(engine, board, weights, seed, games, max_pieces, 'python')
+    record('games_per_sec', games_per_sec, 'higher')
+    record('game_pieces_per_sec', pieces_per_sec, 'higher')
+    record('game_mean_lines', mean_lines, 'higher')
+    return metrics
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for suite_name, metrics in results.items():
+        for name, metric in metrics.items():
+            base = baseline.get(suite_name, {}).get(name)
+            if base is None or not base['value']:
+                continue
+            change = metric['value'] / base['value'] - 1
+            if metric['better'] == 'lower':
+                change = -change
+            if change < -threshold:
+                regressions.append((suite_name, name, base['value'], metric['value'], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine and AI hot paths with fixed seeds.")
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--boards', nargs='+', default=['10x20'], help="board sizes as WIDTHxHEIGHT")
+    parser.add_argument('--distributions', nargs='+', default=['uniform'],
+                        help=f"piece distributions: {', '.join(DISTRIBUTIONS)} or weights like I=2,S=0.5")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--max-pieces', type=int, default=500)
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds per throughput measurement")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+    
+    results = {}
+    for board_text in args.boards:
+        for distribution in args.distributions:
+            suite_name = f"{args.engine}/{board_text}/{distribution}"
+            metrics = run_suite(args.engine, parse_board(board_text), distribution, args.seed,
+                                args.positions, args.games, args.max_pieces, args.min_time)
+            results[suite_name] = metrics
+            print(suite_name)
+            for name, metric in metrics.items():
+                print(f"  {name:<32} {metric['value']:>14.3f}")
+    
+    if args.output:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'args': vars(args)
+            },
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for suite_name, name, before, after, change in regressions:
+            print(f"REGRESSION {suite_name} {name}: {before:.3f} -> {after:.3f} ({change * 100:+.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold * 100:.0f}% against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
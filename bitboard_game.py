@@ -0,0 +1,145 @@
+from game import TetrisGame
+from tetromino import Tetromino
+
+# (dx, highest dy, lowest dy) for each column a rotation covers, left to right.
+COLUMN_PROFILES = {shape_type: tuple(tuple((dx, top, bottom) for (dx, top), (_, bottom) in zip(tops, bottoms))
+                                     for tops, bottoms in zip(Tetromino.TOP_PROFILE[shape_type],
+                                                              Tetromino.BOTTOM_PROFILE[shape_type]))
+                   for shape_type in Tetromino.SHAPE_TYPES}
+
+class BitboardTetrisGame(TetrisGame):
+    # The row masks answer collisions, full rows and the line count of a
+    # candidate placement. board and board_colors are still written on every
+    # lock for the renderers; outside edits to board need refresh_features().
+    _piece_masks = {}
+    
+    def __init__(self, width=10, height=20, piece_source=None):
+        super().__init__(width, height, piece_source)
+        self.FULL_ROW = (1 << self.BOARD_WIDTH) - 1
+        self.rows = [0] * self.BOARD_HEIGHT
+    
+    def get_piece_masks(self, shape_type, rotation, x):
+        key = (shape_type, rotation, x, self.BOARD_WIDTH)
+        masks = self._piece_masks.get(key)
+        if masks is None:
+            min_x, max_x, _, _ = Tetromino.BOUNDS[shape_type][rotation]
+            if x + min_x < 0 or x + max_x >= self.BOARD_WIDTH:
+                masks = ()
+            else:
+                row_bits = {}
+                for dx, dy in Tetromino.BLOCKS[shape_type][rotation]:
+                    row_bits[dy] = row_bits.get(dy, 0) | (1 << (x + dx))
+                masks = tuple(sorted(row_bits.items()))
+            self._piece_masks[key] = masks
+        return masks
+    
+    def is_valid_position(self, piece, dx=0, dy=0, rotation=None):
+        if rotation is None:
+            rotation = piece.rotation
+        masks = self.get_piece_masks(piece.shape_type, rotation, piece.x + dx)
+        if not masks:
+            return False
+        
+        y = piece.y + dy
+        rows = self.rows
+        for row_offset, mask in masks:
+            row = y + row_offset
+            if row >= self.BOARD_HEIGHT:
+                return False
+            if row >= 0 and rows[row] & mask:
+                return False
+        return True
+    
+    def get_drop_features(self, piece, rotation, x):
+        # Same result as TetrisGame.get_drop_features. A piece that lands on
+        # the surface of every column it covers only adds the gap under each
+        # column to the holes, so no cell lists or dicts are built; anything
+        # else (under an overhang, sticking out of the top) takes the generic path.
+        masks = self.get_piece_masks(piece.shape_type, rotation, x)
+        if not masks:
+            return None
+        y = self.get_drop_y(piece, rotation, x, 0)
+        height = self.BOARD_HEIGHT
+        rows = self.rows
+        full_row = self.FULL_ROW
+        lines_cleared = 0
+        for row_offset, mask in masks:
+            row = y + row_offset
+            if row >= height:
+                return None
+            if row < 0:
+                return super().get_drop_features(piece, rotation, x)
+            if rows[row] & mask:
+                return None
+            if rows[row] | mask == full_row:
+                lines_cleared += 1
+        
+        heights = self.column_heights
+        holes = self.holes
+        new_heights = []
+        profile = COLUMN_PROFILES[piece.shape_type][rotation]
+        for dx, top, bottom in profile:
+            surface = height - heights[x + dx]
+            if y + bottom >= surface:
+                return super().get_drop_features(piece, rotation, x)
+            holes += surface - y - bottom - 1
+            new_heights.append(height - y - top)
+        
+        first = x + profile[0][0]
+        last = x + profile[-1][0]
+        bumpiness = self.bumpiness
+        if first > 0:
+            bumpiness += abs(new_heights[0] - heights[first - 1]) - abs(heights[first] - heights[first - 1])
+        for index in range(len(new_heights) - 1):
+            column = first + index
+            bumpiness += abs(new_heights[index] - new_heights[index + 1]) - abs(heights[column] - heights[column + 1])
+        if last < self.BOARD_WIDTH - 1:
+            bumpiness += abs(new_heights[-1] - heights[last + 1]) - abs(heights[last] - heights[last + 1])
+        return holes, y, lines_cleared, bumpiness
+    
+    def lock_piece(self, piece):
+        for row_offset, mask in self.get_piece_masks(piece.shape_type, piece.rotation, piece.x):
+            row = piece.y + row_offset
+            if row >= 0:
+                self.rows[row] |= mask
+        return super().lock_piece(piece)
+    
+    def refresh_features(self):
+        # The row masks are rebuilt from board too, after an outside edit.
+        self.rows = list(TetrisGame.get_row_masks(self))
+        super().refresh_features()
+    
+    def get_row_masks(self):
+        return tuple(self.rows)
+    
+    def get_complete_lines(self):
+        full_row = self.FULL_ROW
+        return [y for y, row in enumerate(self.rows) if row == full_row]
+    
+    def clear_lines(self, lines_to_clear):
+        cleared = set(lines_to_clear)
+        kept = [y for y in range(self.BOARD_HEIGHT) if y not in cleared]
+        count = self.BOARD_HEIGHT - len(kept)
+        
+        self.rows = [0] * count + [self.rows[y] for y in kept]
+        self.board = ([[0 for _ in range(self.BOARD_WIDTH)] for _ in range(count)] +
+                      [self.board[y] for y in kept])
+        self.board_colors = ([[None for _ in range(self.BOARD_WIDTH)] for _ in range(count)] +
+                             [self.board_colors[y] for y in kept])
+        
+        self.clear_line_features(lines_to_clear)
+        self.update_level(len(lines_to_clear))
+    
+    def snapshot(self):
+        clone = super().snapshot()
+        clone.rows = self.rows[:]
+        return clone
+    
+    def reset_game(self):
+        super().reset_game()
+        self.rows = [0] * self.BOARD_HEIGHT
+
+GAME_ENGINES = {
+    'list': TetrisGame,
+    'bitboard': BitboardTetrisGame
+}
\ No newline at end of file
@@ -0,0 +1,73 @@
+import pygame
+
+class DirtyRects:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.cells = None
+        self.regions = {}
+        self.rects = []
+        self.full = False
+    
+    def invalidate(self):
+        self.cells = None
+        self.regions = {}
+    
+    def begin(self):
+        self.rects = []
+        self.full = self.cells is None
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+            self.rects.append(self.screen.get_rect())
+    
+    def restore(self, rect):
+        self.screen.blit(self.background, rect, rect)
+        if not self.full:
+            self.rects.append(rect)
+    
+    def forget_cells(self, rect, cell_rect):
+        # Cells under something drawn on top of them (e.g. a translucent
+        # overlay) have to be repainted whenever that thing changes.
+        if self.cells is None:
+            return
+        for index in range(len(self.cells)):
+            if rect.colliderect(cell_rect(index)):
+                self.cells[index] = False
+    
+    def update_cells(self, cells, cell_rect, draw_cell):
+        previous = self.cells
+        for index, cell in enumerate(cells):
+            if previous is None or previous[index] != cell:
+                if previous is not None:
+                    self.restore(cell_rect(index))
+                if cell is not None:
+                    draw_cell(index, cell)
+        self.cells = cells
+    
+    def update_region(self, name, rect, key, draw):
+        if name in self.regions and self.regions[name] == key:
+            return False
+        self.regions[name] = key
+        self.restore(rect)
+        if draw is not None:
+            draw()
+        return True
+    
+    def finish(self):
+        if self.rects:
+            pygame.display.update(self.rects)
+        return len(self.rects)
+
+def board_cells(game, ghost_alpha, show_piece=True):
+    # One (color, alpha) entry per board cell, row-major, or None where the
+    # empty grid shows through; the same layering as a full redraw.
+    cells = [(color, 255) if color is not None else None
+             for row in game.board_colors for color in row]
+    if show_piece:
+        width = game.BOARD_WIDTH
+        ghost = game.get_ghost_piece()
+        for piece, alpha in ((ghost, ghost_alpha), (game.current_piece, 255)):
+            for x, y in piece.get_blocks():
+                if 0 <= x < width and y >= 0:
+                    cells[y * width + x] = (piece.color, alpha)
+    return cells
\ No newline at end of file
@@ -1,18 +1,23 @@
-import pygame
+import copy
 import random
 from tetromino import Tetromino
 
 class TetrisGame:
-    def __init__(self):
-        self.BOARD_WIDTH = 10
-        self.BOARD_HEIGHT = 20
+    def __init__(self, width=10, height=20, piece_source=None):
+        self.BOARD_WIDTH = width
+        self.BOARD_HEIGHT = height
         self.BLOCK_SIZE = 30
+        # Pieces spawn centred: column 3 on the standard 10-wide board.
+        self.spawn_x = (width - 4) // 2
+        self.piece_source = piece_source
+        self.recorder = None
         
         self.board = [[0 for _ in range(self.BOARD_WIDTH)] for _ in range(self.BOARD_HEIGHT)]
         self.board_colors = [[None for _ in range(self.BOARD_WIDTH)] for _ in range(self.BOARD_HEIGHT)]
+        self.reset_features()
         
-        self.current_piece = Tetromino()
-        self.next_piece = Tetromino()
+        self.current_piece = self.new_piece()
+        self.next_piece = self.new_piece()
         
         self.fall_time = 0
         self.fall_speed = 500
@@ -23,41 +28,211 @@ class TetrisGame:
         self.game_over = False
         self.paused = False
         
+    def new_piece(self):
+        if self.piece_source is None:
+            return self.spawn_piece()
+        return self.spawn_piece(self.piece_source())
+    
+    def spawn_piece(self, shape_type=None):
+        piece = Tetromino(shape_type)
+        piece.x = self.spawn_x
+        return piece
+    
+    def get_preview(self, count):
+        # Shape types queued after next_piece, when the piece source can tell.
+        peek = getattr(self.piece_source, 'peek', None)
+        if peek is None or count <= 0:
+            return []
+        return peek(count)
+    
     def is_valid_position(self, piece, dx=0, dy=0, rotation=None):
-        if rotation is not None:
-            test_piece = piece.copy()
-            test_piece.rotation = rotation
-            test_piece.x += dx
-            test_piece.y += dy
-            blocks = test_piece.get_blocks()
-        else:
-            blocks = []
-            for x, y in piece.get_blocks():
-                blocks.append((x + dx, y + dy))
+        if rotation is None:
+            rotation = piece.rotation
+        piece_x = piece.x + dx
+        piece_y = piece.y + dy
         
-        for x, y in blocks:
+        for offset_x, offset_y in Tetromino.BLOCKS[piece.shape_type][rotation]:
+            x = piece_x + offset_x
+            y = piece_y + offset_y
             if x < 0 or x >= self.BOARD_WIDTH or y >= self.BOARD_HEIGHT:
                 return False
             if y >= 0 and self.board[y][x] != 0:
                 return False
         return True
     
-    def place_piece(self, piece):
-        for x, y in piece.get_blocks():
+    def get_drop_y(self, piece, rotation=None, x=None, y=None):
+        # Row the piece comes to rest on when falling from y. Normally one pass
+        # over the rotation's bottom profile against the column heights; if the
+        # piece starts at or below the surface of a column it covers (under an
+        # overhang, or off the board) it falls one row at a time instead.
+        if rotation is None:
+            rotation = piece.rotation
+        if x is None:
+            x = piece.x
+        if y is None:
+            y = piece.y
+        
+        min_x, max_x, _, _ = Tetromino.BOUNDS[piece.shape_type][rotation]
+        if x + min_x >= 0 and x + max_x < self.BOARD_WIDTH:
+            heights = self.column_heights
+            landing = self.BOARD_HEIGHT
+            for dx, dy in Tetromino.BOTTOM_PROFILE[piece.shape_type][rotation]:
+                landing = min(landing, self.BOARD_HEIGHT - heights[x + dx] - 1 - dy)
+            if landing >= y:
+                return landing
+        
+        dx = x - piece.x
+        dy = y - piece.y
+        while self.is_valid_position(piece, dx, dy + 1, rotation):
+            dy += 1
+        return piece.y + dy
+    
+    def get_row_masks(self):
+        masks = []
+        for row in self.board:
+            mask = 0
+            for x, cell in enumerate(row):
+                if cell != 0:
+                    mask |= 1 << x
+            masks.append(mask)
+        return tuple(masks)
+    
+    def reset_features(self):
+        self.column_heights = [0] * self.BOARD_WIDTH
+        self.column_holes = [0] * self.BOARD_WIDTH
+        self.row_fill = [0] * self.BOARD_HEIGHT
+        self.holes = 0
+        self.bumpiness = 0
+    
+    def refresh_features(self):
+        self.reset_features()
+        self.row_fill = [sum(1 for cell in row if cell != 0) for row in self.board]
+        for x in range(self.BOARD_WIDTH):
+            self.set_column(x, *self.scan_column(x))
+    
+    def scan_column(self, x):
+        board = self.board
+        for y in range(self.BOARD_HEIGHT):
+            if board[y][x] != 0:
+                holes = sum(1 for below in range(y + 1, self.BOARD_HEIGHT) if board[below][x] == 0)
+                return self.BOARD_HEIGHT - y, holes
+        return 0, 0
+    
+    def set_column(self, x, height, holes):
+        heights = self.column_heights
+        old_height = heights[x]
+        if x > 0:
+            self.bumpiness += abs(height - heights[x - 1]) - abs(old_height - heights[x - 1])
+        if x < self.BOARD_WIDTH - 1:
+            self.bumpiness += abs(height - heights[x + 1]) - abs(old_height - heights[x + 1])
+        heights[x] = height
+        
+        self.holes += holes - self.column_holes[x]
+        self.column_holes[x] = holes
+    
+    def column_after_placement(self, x, rows):
+        height = self.column_heights[x]
+        holes = self.column_holes[x]
+        top = self.BOARD_HEIGHT - height
+        above = [y for y in rows if y < top]
+        holes -= len(rows) - len(above)
+        if above:
+            new_top = min(above)
+            holes += top - new_top - len(above)
+            height = self.BOARD_HEIGHT - new_top
+        return height, holes
+    
+    def placement_features(self, blocks):
+        columns = {}
+        rows = {}
+        for x, y in blocks:
+            if y >= 0:
+                columns.setdefault(x, []).append(y)
+                rows[y] = rows.get(y, 0) + 1
+        
+        lines_cleared = 0
+        for y, count in rows.items():
+            if self.row_fill[y] + count == self.BOARD_WIDTH:
+                lines_cleared += 1
+        
+        heights = self.column_heights
+        holes = self.holes
+        new_heights = {}
+        for x, column_rows in columns.items():
+            new_heights[x], column_holes = self.column_after_placement(x, column_rows)
+            holes += column_holes - self.column_holes[x]
+        
+        bumpiness = self.bumpiness
+        edges = set()
+        for x in new_heights:
+            if x > 0:
+                edges.add(x - 1)
+            if x < self.BOARD_WIDTH - 1:
+                edges.add(x)
+        for x in edges:
+            left = heights[x]
+            right = heights[x + 1]
+            bumpiness += abs(new_heights.get(x, left) - new_heights.get(x + 1, right)) - abs(left - right)
+        
+        return holes, lines_cleared, bumpiness
+    
+    def get_drop_features(self, piece, rotation, x):
+        # (holes, landing row, lines cleared, bumpiness) for the piece dropped
+        # from the top in this rotation and column, or None if it does not fit.
+        y = self.get_drop_y(piece, rotation, x, 0)
+        if not self.is_valid_position(piece, x - piece.x, y - piece.y, rotation):
+            return None
+        blocks = [(x + dx, y + dy) for dx, dy in Tetromino.BLOCKS[piece.shape_type][rotation]]
+        holes, lines_cleared, bumpiness = self.placement_features(blocks)
+        return holes, y, lines_cleared, bumpiness
+    
+    def add_block_features(self, blocks):
+        columns = {}
+        for x, y in blocks:
+            if y >= 0:
+                columns.setdefault(x, []).append(y)
+                self.row_fill[y] += 1
+        for x, column_rows in columns.items():
+            self.set_column(x, *self.column_after_placement(x, column_rows))
+    
+    def clear_line_features(self, lines_to_clear):
+        cleared = set(lines_to_clear)
+        count = len(cleared)
+        self.row_fill = [0] * count + [fill for y, fill in enumerate(self.row_fill) if y not in cleared]
+        
+        for x in range(self.BOARD_WIDTH):
+            height = self.column_heights[x]
+            if self.BOARD_HEIGHT - height in cleared:
+                self.set_column(x, *self.scan_column(x))
+            else:
+                self.set_column(x, height - count, self.column_holes[x])
+    
+    def lock_piece(self, piece):
+        blocks = piece.get_blocks()
+        for x, y in blocks:
             if y >= 0:
                 self.board[y][x] = 1
                 self.board_colors[y][x] = piece.color
+        self.add_block_features(blocks)
         
         lines_to_clear = self.get_complete_lines()
         if lines_to_clear:
             self.clear_lines(lines_to_clear)
             self.update_score(len(lines_to_clear))
+        return len(lines_to_clear)
+    
+    def place_piece(self, piece):
+        score_before = self.score
+        self.lock_piece(piece)
         
         self.current_piece = self.next_piece
-        self.next_piece = Tetromino()
+        self.next_piece = self.new_piece()
         
         if not self.is_valid_position(self.current_piece):
             self.game_over = True
+        
+        if self.recorder is not None:
+            self.recorder.record_placement(self, piece, score_before)
     
     def get_complete_lines(self):
         complete_lines = []
@@ -70,10 +245,15 @@ class TetrisGame:
         for line in sorted(lines_to_clear, reverse=True):
             del self.board[line]
             del self.board_colors[line]
+        for _ in lines_to_clear:
             self.board.insert(0, [0 for _ in range(self.BOARD_WIDTH)])
             self.board_colors.insert(0, [None for _ in range(self.BOARD_WIDTH)])
         
-        self.lines_cleared += len(lines_to_clear)
+        self.clear_line_features(lines_to_clear)
+        self.update_level(len(lines_to_clear))
+    
+    def update_level(self, lines_cleared):
+        self.lines_cleared += lines_cleared
         self.level = self.lines_cleared // 10 + 1
         self.fall_speed = max(50, 500 - (self.level - 1) * 50)
     
@@ -94,10 +274,21 @@ class TetrisGame:
             return True
         return False
     
+    def apply_placement(self, rotation, x):
+        piece = self.current_piece
+        if not self.is_valid_position(piece, x - piece.x, 0, rotation):
+            return False
+        piece.rotation = rotation
+        piece.x = x
+        self.hard_drop()
+        return True
+    
     def hard_drop(self):
-        while self.move_piece(0, 1):
-            self.score += 2
-        self.place_piece(self.current_piece)
+        piece = self.current_piece
+        landing = self.get_drop_y(piece)
+        self.score += 2 * (landing - piece.y)
+        piece.y = landing
+        self.place_piece(piece)
     
     def update(self, dt):
         if self.game_over or self.paused:
@@ -113,10 +304,13 @@ class TetrisGame:
         self.paused = not self.paused
     
     def reset_game(self):
+        if self.recorder is not None:
+            self.recorder.finish_game(self)
         self.board = [[0 for _ in range(self.BOARD_WIDTH)] for _ in range(self.BOARD_HEIGHT)]
         self.board_colors = [[None for _ in range(self.BOARD_WIDTH)] for _ in range(self.BOARD_HEIGHT)]
-        self.current_piece = Tetromino()
-        self.next_piece = Tetromino()
+        self.reset_features()
+        self.current_piece = self.new_piece()
+        self.next_piece = self.new_piece()
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
@@ -124,9 +318,22 @@ class TetrisGame:
         self.fall_time = 0
         self.game_over = False
         self.paused = False
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+    
+    def snapshot(self):
+        clone = copy.copy(self)
+        clone.recorder = None
+        clone.board = [row[:] for row in self.board]
+        clone.board_colors = [row[:] for row in self.board_colors]
+        clone.column_heights = self.column_heights[:]
+        clone.column_holes = self.column_holes[:]
+        clone.row_fill = self.row_fill[:]
+        clone.current_piece = self.current_piece.copy()
+        clone.next_piece = self.next_piece.copy()
+        return clone
     
     def get_ghost_piece(self):
         ghost = self.current_piece.copy()
-        while self.is_valid_position(ghost, 0, 1):
-            ghost.move(0, 1)
+        ghost.y = self.get_drop_y(ghost)
         return ghost
\ No newline at end of file
@@ -0,0 +1,129 @@
+import argparse
+import time
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from lookahead import BeamSearchAI
+from piece_generator import PIECE_GENERATORS, make_generator
+from replay import GameRecorder
+
+class HeadlessRunner:
+    def __init__(self, weights=None, engine='list', max_pieces=None, backend='python', cache_size=0,
+                 depth=1, beam_width=8, time_budget=None, pieces='uniform'):
+        if depth > 1:
+            self.ai = BeamSearchAI(depth, beam_width, time_budget, backend, cache_size)
+        else:
+            self.ai = TetrisAI(backend, cache_size)
+        if weights is not None:
+            self.ai.set_weights(*weights)
+        self.engine = engine
+        self.max_pieces = max_pieces
+        self.pieces = pieces
+        self.recorder = None
+        self.latencies = []
+    
+    def create_game(self, seed):
+        game = GAME_ENGINES[self.engine](piece_source=make_generator(self.pieces, seed))
+        if self.recorder is not None:
+            self.recorder.seed = seed
+            self.recorder.generator = self.pieces
+            self.recorder.attach(game)
+        return game
+    
+    def play_game(self, game):
+        pieces = 0
+        start = time.perf_counter()
+        while not game.game_over:
+            if self.max_pieces is not None and pieces >= self.max_pieces:
+                break
+            think_start = time.perf_counter()
+            move = self.ai.get_best_move(game)
+            self.latencies.append(time.perf_counter() - think_start)
+            if move is None or not game.apply_placement(move['rotation'], move['x']):
+                game.game_over = True
+                break
+            pieces += 1
+        elapsed = time.perf_counter() - start
+        if game.recorder is not None:
+            game.recorder.finish_game(game)
+        
+        return {
+            'lines': game.lines_cleared,
+            'score': game.score,
+            'level': game.level,
+            'pieces': pieces,
+            'topped_out': game.game_over,
+            'elapsed': elapsed
+        }
+    
+    def run(self, games, seed=0):
+        for index in range(games):
+            game = self.create_game(seed + index)
+            result = self.play_game(game)
+            result['seed'] = seed + index
+            yield result
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(results):
+    pieces = sum(result['pieces'] for result in results)
+    elapsed = sum(result['elapsed'] for result in results)
+    return {
+        'games': len(results),
+        'mean_lines': sum(result['lines'] for result in results) / len(results),
+        'mean_score': sum(result['score'] for result in results) / len(results),
+        'pieces': pieces,
+        'elapsed': elapsed,
+        'pieces_per_sec': pieces / elapsed if elapsed > 0 else 0.0,
+        'games_per_sec': len(results) / elapsed if elapsed > 0 else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run AI games without a display or frame timers.")
+    parser.add_argument('--weights', type=float, nargs=4, default=None,
+                        metavar=('HOLES', 'LANDING_HEIGHT', 'LINES', 'BUMPINESS'))
+    parser.add_argument('--weights-file', help="JSON weights, including any extended feature weights")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--max-pieces', type=int, default=None)
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    parser.add_argument('--cache-size', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=1, help="pieces to search: 1 is the current piece only, 2 adds the next piece")
+    parser.add_argument('--beam-width', type=int, default=8)
+    parser.add_argument('--time-budget', type=float, default=None, help="seconds per decision for lookahead")
+    parser.add_argument('--pieces', default='uniform',
+                        help=f"piece generator: {', '.join(PIECE_GENERATORS)} or a fixed sequence like IOTSZJL")
+    parser.add_argument('--record', help="append every game to this replay file")
+    args = parser.parse_args()
+    
+    runner = HeadlessRunner(args.weights, args.engine, args.max_pieces, args.backend, args.cache_size,
+                            args.depth, args.beam_width, args.time_budget, args.pieces)
+    if args.weights_file:
+        runner.ai.load_weights(args.weights_file)
+    if args.record:
+        runner.recorder = GameRecorder(args.record)
+    results = []
+    for index, result in enumerate(runner.run(args.games, args.seed)):
+        results.append(result)
+        print(f"game {index + 1:>3} (seed {result['seed']}): lines={result['lines']} score={result['score']} "
+              f"pieces={result['pieces']} {'topped out' if result['topped_out'] else 'piece limit'} "
+              f"in {result['elapsed']:.2f}s")
+    
+    summary = summarize(results)
+    print(f"{summary['games']} games: mean lines {summary['mean_lines']:.1f}, mean score {summary['mean_score']:.1f}, "
+          f"{summary['pieces_per_sec']:.1f} pieces/s, {summary['games_per_sec']:.2f} games/s")
+    print(f"decision latency: p50 {percentile(runner.latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(runner.latencies, 0.99) * 1000:.2f} ms")
+    if runner.ai.cache is not None:
+        print(f"cache: {runner.ai.cache.stats()}")
+    if runner.recorder is not None:
+        runner.recorder.close()
+        print(f"recorded {runner.recorder.games_written} games to {args.record}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
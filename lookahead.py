@@ -0,0 +1,99 @@
+import time
+from ai_player import TetrisAI
+from tetromino import Tetromino
+
+class SearchNode:
+    __slots__ = ('game', 'score', 'first_move')
+    
+    def __init__(self, game, score, first_move):
+        self.game = game
+        self.score = score
+        self.first_move = first_move
+
+class BeamSearchAI(TetrisAI):
+    def __init__(self, depth=2, beam_width=8, time_budget=None, backend='python', cache_size=0):
+        super().__init__(backend, cache_size)
+        self.depth = depth
+        self.beam_width = beam_width
+        self.time_budget = time_budget
+        self.last_search_depth = 0
+    
+    def get_piece_queue(self, game, preview=None):
+        queue = [game.current_piece.shape_type, game.next_piece.shape_type]
+        if preview is None:
+            preview = game.get_preview(self.depth - 2)
+        if preview:
+            queue.extend(preview)
+        return queue[:self.depth]
+    
+    def get_node_candidates(self, game):
+        if self.cache is not None:
+            entry = self.cache.get_entry(self, game)
+            return self.filter_reachable(game, entry.moves, entry.features)
+        return self.get_candidates(game)
+    
+    def expand(self, node, shape_type):
+        # A path is worth the line rewards of the plies already locked plus
+        # the full one-ply evaluation of its newest placement. The root keeps
+        # the live piece, wherever it has moved; later plies deal new pieces.
+        if node.first_move is not None:
+            node.game.current_piece = node.game.spawn_piece(shape_type)
+        moves, features = self.get_node_candidates(node.game)
+        children = []
+        for move, feature in zip(moves, features):
+            first_move = node.first_move or (move, feature)
+            children.append((node.score + self.evaluate(*feature), node, move, feature, first_move))
+        return children
+    
+    def materialize(self, child, shape_type):
+        _, node, (rotation, x), feature, first_move = child
+        piece = Tetromino(shape_type)
+        piece.rotation = rotation
+        piece.x = x
+        piece.y = feature[1]
+        game = node.game.snapshot()
+        game.lock_piece(piece)
+        score = node.score + self.lines_cleared_weight * feature[2]
+        return SearchNode(game, score, first_move)
+    
+    def get_best_move(self, game, preview=None):
+        queue = self.get_piece_queue(game, preview)
+        if len(queue) < 2 or self.beam_width < 1:
+            return super().get_best_move(game)
+        
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+        
+        root = game.snapshot()
+        beam = [SearchNode(root, 0.0, None)]
+        best = None
+        self.last_search_depth = 0
+        
+        for ply, shape_type in enumerate(queue):
+            children = []
+            for node in beam:
+                if ply > 0 and deadline is not None and time.perf_counter() >= deadline:
+                    children = []
+                    break
+                children.extend(self.expand(node, shape_type))
+            if not children:
+                break
+            children.sort(key=lambda child: child[0], reverse=True)
+            best = children[0]
+            self.last_search_depth = ply + 1
+            
+            if ply == len(queue) - 1:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            beam = [self.materialize(child, shape_type) for child in children[:self.beam_width]]
+        
+        if best is None:
+            return None
+        
+        (rotation, x), feature = best[4]
+        move = self.make_move(rotation, x, feature)
+        move['score'] = best[0]
+        move['search_depth'] = self.last_search_depth
+        return move
\ No newline at end of file
@@ -1,10 +1,15 @@
+import argparse
 import pygame
 import sys
-from game import TetrisGame
+from bitboard_game import GAME_ENGINES
 from controls import Controls
+from dirty_rects import DirtyRects, board_cells
+from piece_generator import PIECE_GENERATORS, make_generator
+from replay import GameRecorder
+from render_cache import RenderCache
 
 class TetrisRenderer:
-    def __init__(self, game):
+    def __init__(self, game, dirty_rects=False):
         self.game = game
         self.BLOCK_SIZE = game.BLOCK_SIZE
         self.BOARD_WIDTH = game.BOARD_WIDTH * self.BLOCK_SIZE
@@ -25,18 +30,14 @@ class TetrisRenderer:
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
         
+        self.render_cache = RenderCache(self.BLOCK_SIZE)
+        self.dirty = None
+        self.overlay_key = None
+        if dirty_rects:
+            self.dirty = DirtyRects(self.screen, self.build_background())
+        
     def draw_block(self, x, y, color, alpha=255):
-        rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE, 
-                          self.BLOCK_SIZE, self.BLOCK_SIZE)
-        
-        if alpha < 255:
-            surf = pygame.Surface((self.BLOCK_SIZE, self.BLOCK_SIZE))
-            surf.set_alpha(alpha)
-            surf.fill(color)
-            self.screen.blit(surf, rect)
-        else:
-            pygame.draw.rect(self.screen, color, rect)
-            pygame.draw.rect(self.screen, self.WHITE, rect, 1)
+        self.screen.blit(self.render_cache.block(color, alpha), (x * self.BLOCK_SIZE, y * self.BLOCK_SIZE))
     
     def draw_board(self):
         for y in range(self.game.BOARD_HEIGHT):
@@ -45,9 +46,12 @@ class TetrisRenderer:
                     color = self.game.board_colors[y][x]
                     self.draw_block(x, y, color)
                 else:
-                    rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE,
-                                     self.BLOCK_SIZE, self.BLOCK_SIZE)
-                    pygame.draw.rect(self.screen, self.DARK_GRAY, rect, 1)
+                    self.draw_empty_cell(x, y)
+    
+    def draw_empty_cell(self, x, y):
+        rect = pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE,
+                         self.BLOCK_SIZE, self.BLOCK_SIZE)
+        pygame.draw.rect(self.screen, self.DARK_GRAY, rect, 1)
     
     def draw_piece(self, piece, alpha=255):
         for x, y in piece.get_blocks():
@@ -62,30 +66,25 @@ class TetrisRenderer:
         next_x = self.BOARD_WIDTH + 20
         next_y = 50
         
-        text = self.font.render("Next:", True, self.WHITE)
+        text = self.render_cache.text(self.font, "Next:", self.WHITE)
         self.screen.blit(text, (next_x, next_y - 30))
         
-        shape = self.game.next_piece.get_shape()
-        for row_idx, row in enumerate(shape):
-            for col_idx, cell in enumerate(row):
-                if cell == '#':
-                    x = next_x + col_idx * 20
-                    y = next_y + row_idx * 20
-                    rect = pygame.Rect(x, y, 20, 20)
-                    pygame.draw.rect(self.screen, self.game.next_piece.color, rect)
-                    pygame.draw.rect(self.screen, self.WHITE, rect, 1)
+        for col_idx, row_idx in self.game.next_piece.get_offsets():
+            x = next_x + col_idx * 20
+            y = next_y + row_idx * 20
+            self.screen.blit(self.render_cache.block(self.game.next_piece.color, size=20), (x, y))
     
     def draw_score(self):
         score_x = self.BOARD_WIDTH + 20
         score_y = 150
         
-        score_text = self.font.render(f"Score: {self.game.score}", True, self.WHITE)
+        score_text = self.render_cache.text(self.font, f"Score: {self.game.score}", self.WHITE)
         self.screen.blit(score_text, (score_x, score_y))
         
-        lines_text = self.font.render(f"Lines: {self.game.lines_cleared}", True, self.WHITE)
+        lines_text = self.render_cache.text(self.font, f"Lines: {self.game.lines_cleared}", self.WHITE)
         self.screen.blit(lines_text, (score_x, score_y + 40))
         
-        level_text = self.font.render(f"Level: {self.game.level}", True, self.WHITE)
+        level_text = self.render_cache.text(self.font, f"Level: {self.game.level}", self.WHITE)
         self.screen.blit(level_text, (score_x, score_y + 80))
     
     def draw_controls(self):
@@ -105,9 +104,9 @@ class TetrisRenderer:
         
         for i, text in enumerate(controls_text):
             if i == 0:
-                rendered = self.font.render(text, True, self.WHITE)
+                rendered = self.render_cache.text(self.font, text, self.WHITE)
             else:
-                rendered = self.small_font.render(text, True, self.WHITE)
+                rendered = self.render_cache.text(self.small_font, text, self.WHITE)
             self.screen.blit(rendered, (controls_x, controls_y + i * 25))
     
     def draw_game_over(self):
@@ -117,8 +116,8 @@ class TetrisRenderer:
             overlay.fill(self.BLACK)
             self.screen.blit(overlay, (0, 0))
             
-            game_over_text = self.font.render("GAME OVER", True, self.WHITE)
-            restart_text = self.small_font.render("Press R to restart", True, self.WHITE)
+            game_over_text = self.render_cache.text(self.font, "GAME OVER", self.WHITE)
+            restart_text = self.render_cache.text(self.small_font, "Press R to restart", self.WHITE)
             
             text_rect = game_over_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2))
             restart_rect = restart_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2 + 40))
@@ -133,11 +132,58 @@ class TetrisRenderer:
             overlay.fill(self.BLACK)
             self.screen.blit(overlay, (0, 0))
             
-            paused_text = self.font.render("PAUSED", True, self.WHITE)
+            paused_text = self.render_cache.text(self.font, "PAUSED", self.WHITE)
             text_rect = paused_text.get_rect(center=(self.WINDOW_WIDTH // 2, self.WINDOW_HEIGHT // 2))
             self.screen.blit(paused_text, text_rect)
     
+    def build_background(self):
+        screen = self.screen
+        self.screen = pygame.Surface(screen.get_size())
+        self.screen.fill(self.BLACK)
+        for y in range(self.game.BOARD_HEIGHT):
+            for x in range(self.game.BOARD_WIDTH):
+                self.draw_empty_cell(x, y)
+        self.draw_controls()
+        background = self.screen
+        self.screen = screen
+        return background
+    
+    def cell_rect(self, index):
+        x = index % self.game.BOARD_WIDTH
+        y = index // self.game.BOARD_WIDTH
+        return pygame.Rect(x * self.BLOCK_SIZE, y * self.BLOCK_SIZE, self.BLOCK_SIZE, self.BLOCK_SIZE)
+    
+    def draw_cell(self, index, cell):
+        self.draw_block(index % self.game.BOARD_WIDTH, index // self.game.BOARD_WIDTH, cell[0], cell[1])
+    
+    def render_dirty(self):
+        # Returns False when the frame needs a full redraw instead: the pause
+        # and game over overlays cover the whole window.
+        game = self.game
+        hud = (game.score, game.lines_cleared, game.level)
+        if game.game_over or game.paused:
+            key = (game.game_over, game.paused, hud)
+            if key == self.overlay_key:
+                return True
+            self.overlay_key = key
+            self.dirty.invalidate()
+            return False
+        self.overlay_key = None
+        
+        dirty = self.dirty
+        dirty.begin()
+        dirty.update_cells(board_cells(game, self.GHOST_ALPHA), self.cell_rect, self.draw_cell)
+        dirty.update_region('next', pygame.Rect(self.BOARD_WIDTH, 0, self.SIDEBAR_WIDTH, 150),
+                            (game.next_piece.shape_type, game.next_piece.color), self.draw_next_piece)
+        dirty.update_region('score', pygame.Rect(self.BOARD_WIDTH, 150, self.SIDEBAR_WIDTH, 140),
+                            hud, self.draw_score)
+        dirty.finish()
+        return True
+    
     def render(self):
+        if self.dirty is not None and self.render_dirty():
+            return
+        
         self.screen.fill(self.BLACK)
         
         self.draw_board()
@@ -155,11 +201,24 @@ class TetrisRenderer:
         pygame.display.flip()
 
 def main():
+    parser = argparse.ArgumentParser(description="Play Tetris.")
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--pieces', help=f"piece generator: {', '.join(PIECE_GENERATORS)} or a fixed sequence like IOTSZJL")
+    parser.add_argument('--seed', type=int, default=None, help="seed for --pieces")
+    parser.add_argument('--record', help="append every game to this replay file")
+    parser.add_argument('--dirty-rects', action='store_true', help="redraw only the parts of the window that changed")
+    args = parser.parse_args()
+    
     pygame.init()
     clock = pygame.time.Clock()
     
-    game = TetrisGame()
-    renderer = TetrisRenderer(game)
+    piece_source = make_generator(args.pieces, args.seed) if args.pieces else None
+    game = GAME_ENGINES[args.engine](piece_source=piece_source)
+    recorder = None
+    if args.record:
+        recorder = GameRecorder(args.record, args.seed, args.pieces or '')
+        recorder.attach(game)
+    renderer = TetrisRenderer(game, args.dirty_rects)
     controls = Controls()
     
     move_timer = 0
@@ -211,6 +270,8 @@ def main():
         
         renderer.render()
     
+    if recorder is not None:
+        recorder.close(game)
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,84 @@
+import random
+from array import array
+from tetromino import Tetromino
+
+class PieceGenerator:
+    # A piece source for TetrisGame: calling it returns the next shape type.
+    # Pieces are drawn in blocks into a byte array of shape indices, and every
+    # generator owns its own random.Random, so two generators built with the
+    # same seed deal the same sequence regardless of what else runs.
+    BLOCK_SIZE = 1024
+    
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.buffer = array('B')
+        self.position = 0
+        self.dealt = 0
+    
+    def generate(self, count):
+        raise NotImplementedError
+    
+    def fill(self, needed):
+        if self.position:
+            del self.buffer[:self.position]
+            self.position = 0
+        while len(self.buffer) < needed:
+            self.buffer.extend(self.generate(self.BLOCK_SIZE))
+    
+    def __call__(self):
+        if self.position >= len(self.buffer):
+            self.fill(1)
+        index = self.buffer[self.position]
+        self.position += 1
+        self.dealt += 1
+        return Tetromino.SHAPE_TYPES[index]
+    
+    def peek(self, count):
+        if self.position + count > len(self.buffer):
+            self.fill(count)
+        return [Tetromino.SHAPE_TYPES[index] for index in self.buffer[self.position:self.position + count]]
+
+class UniformGenerator(PieceGenerator):
+    def __init__(self, seed=None, weights=None):
+        super().__init__(seed)
+        self.weights = weights
+        self.indices = range(len(Tetromino.SHAPE_TYPES))
+    
+    def generate(self, count):
+        return self.rng.choices(self.indices, self.weights, k=count)
+
+class BagGenerator(PieceGenerator):
+    # Deals every shape once per shuffled bag of seven.
+    def generate(self, count):
+        pieces = []
+        bag = list(range(len(Tetromino.SHAPE_TYPES)))
+        while len(pieces) < count:
+            self.rng.shuffle(bag)
+            pieces.extend(bag)
+        return pieces
+
+class SequenceGenerator(PieceGenerator):
+    # Repeats a fixed sequence such as 'IOTSZJL'; the seed is not used.
+    def __init__(self, sequence, seed=None):
+        super().__init__(seed)
+        self.sequence = [Tetromino.SHAPE_TYPES.index(shape_type) for shape_type in sequence]
+        self.offset = 0
+    
+    def generate(self, count):
+        pieces = []
+        while len(pieces) < count:
+            pieces.append(self.sequence[self.offset])
+            self.offset = (self.offset + 1) % len(self.sequence)
+        return pieces
+
+PIECE_GENERATORS = {
+    'uniform': UniformGenerator,
+    'bag': BagGenerator
+}
+
+def make_generator(name, seed=None):
+    # 'uniform', 'bag', or a literal sequence of shape letters like 'IOTSZJL'.
+    if name in PIECE_GENERATORS:
+        return PIECE_GENERATORS[name](seed)
+    return SequenceGenerator(name.upper(), seed)
\ No newline at end of file
@@ -0,0 +1,56 @@
+from tetromino import Tetromino
+
+_placements = {}
+
+def get_placements(shape_type, width):
+    # Every (rotation, x) that fits between the walls, in rotation-major order,
+    # keeping only the first of any placements that cover the same cells.
+    key = (shape_type, width)
+    placements = _placements.get(key)
+    if placements is None:
+        placements = []
+        seen = set()
+        for rotation, blocks in enumerate(Tetromino.BLOCKS[shape_type]):
+            min_x, max_x, _, _ = Tetromino.BOUNDS[shape_type][rotation]
+            for x in range(-min_x, width - max_x):
+                footprint = frozenset((x + dx, dy) for dx, dy in blocks)
+                if footprint not in seen:
+                    seen.add(footprint)
+                    placements.append((rotation, x))
+        placements = tuple(placements)
+        _placements[key] = placements
+    return placements
+
+def get_reachable_ranges(game):
+    # The x interval each rotation can reach the way get_move_sequence plays a
+    # move: rotate in place first, then slide sideways, at the piece's current
+    # height. None marks rotations that cannot be reached.
+    piece = game.current_piece
+    rotation_count = len(Tetromino.BLOCKS[piece.shape_type])
+    ranges = [None] * rotation_count
+    rotation = piece.rotation
+    for _ in range(rotation_count):
+        if not game.is_valid_position(piece, 0, 0, rotation):
+            break
+        low = 0
+        while game.is_valid_position(piece, low - 1, 0, rotation):
+            low -= 1
+        high = 0
+        while game.is_valid_position(piece, high + 1, 0, rotation):
+            high += 1
+        ranges[rotation] = (piece.x + low, piece.x + high)
+        rotation = (rotation + 1) % rotation_count
+    return tuple(ranges)
+
+def filter_reachable(placements, ranges):
+    reachable = []
+    for index, (rotation, x) in enumerate(placements):
+        bounds = ranges[rotation]
+        if bounds is not None and bounds[0] <= x <= bounds[1]:
+            reachable.append(index)
+    return reachable
+
+def get_reachable_placements(game):
+    placements = get_placements(game.current_piece.shape_type, game.BOARD_WIDTH)
+    ranges = get_reachable_ranges(game)
+    return [placements[index] for index in filter_reachable(placements, ranges)]
\ No newline at end of file
@@ -0,0 +1,97 @@
+import json
+import time
+from collections import deque
+
+class NullProfiler:
+    enabled = False
+    
+    def begin_frame(self):
+        pass
+    
+    def pause(self):
+        pass
+    
+    def mark(self, phase):
+        pass
+    
+    def summary(self, frames=60):
+        return None
+    
+    def dump(self, path):
+        return 0
+
+class FrameProfiler:
+    enabled = True
+    
+    def __init__(self, capacity=1800):
+        self.frames = deque(maxlen=capacity)
+        self.frame_start = None
+        self.last_mark = None
+        self.phases = None
+    
+    def begin_frame(self):
+        # Each frame is stored as (start, duration, [(phase, start, duration), ...])
+        # in perf_counter seconds; the oldest frames fall off the ring buffer.
+        now = time.perf_counter()
+        if self.phases is not None:
+            self.frames.append((self.frame_start, now - self.frame_start, self.phases))
+        self.frame_start = now
+        self.last_mark = now
+        self.phases = []
+    
+    def pause(self):
+        # Drop the frame in progress so the gap until recording resumes is not
+        # counted as one long frame.
+        self.phases = None
+    
+    def mark(self, phase):
+        # Between pause() and the next begin_frame() there is no frame to add to,
+        # e.g. when the overlay is switched on partway through a frame.
+        if self.phases is None:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, self.last_mark, now - self.last_mark))
+        self.last_mark = now
+    
+    def summary(self, frames=60):
+        recent = list(self.frames)[-frames:]
+        if not recent:
+            return None
+        
+        totals = {}
+        peaks = {}
+        for _, _, phases in recent:
+            for phase, _, duration in phases:
+                totals[phase] = totals.get(phase, 0.0) + duration
+                peaks[phase] = max(peaks.get(phase, 0.0), duration)
+        
+        frame_time = sum(frame[1] for frame in recent)
+        return {
+            'frames': len(recent),
+            'fps': len(recent) / frame_time if frame_time > 0 else 0.0,
+            'frame_ms': frame_time / len(recent) * 1000,
+            'frame_max_ms': max(frame[1] for frame in recent) * 1000,
+            'phase_ms': {phase: total / len(recent) * 1000 for phase, total in totals.items()},
+            'phase_max_ms': {phase: peak * 1000 for phase, peak in peaks.items()}
+        }
+    
+    def dump(self, path):
+        # Chrome trace event format, so the file opens in chrome://tracing or Perfetto.
+        if not self.frames:
+            return 0
+        origin = self.frames[0][0]
+        events = []
+        for index, (start, duration, phases) in enumerate(self.frames):
+            events.append({
+                'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0,
+                'ts': (start - origin) * 1e6, 'dur': duration * 1e6,
+                'args': {'index': index}
+            })
+            for phase, phase_start, phase_duration in phases:
+                events.append({
+                    'name': phase, 'ph': 'X', 'pid': 0, 'tid': 0,
+                    'ts': (phase_start - origin) * 1e6, 'dur': phase_duration * 1e6
+                })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(self.frames)
\ No newline at end of file
@@ -0,0 +1,58 @@
+import pygame
+from collections import OrderedDict
+
+WHITE = (255, 255, 255)
+
+class RenderCache:
+    def __init__(self, block_size, text_capacity=512):
+        self.block_size = block_size
+        self.text_capacity = text_capacity
+        self.texts = OrderedDict()
+        self.blocks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def text(self, font, text, color):
+        key = (font, text, color)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.texts[key] = surface
+        if len(self.texts) > self.text_capacity:
+            self.texts.popitem(last=False)
+            self.evictions += 1
+        return surface
+    
+    def block(self, color, alpha=255, size=None):
+        # Sprites are drawn exactly like the direct draw calls they replace: an
+        # opaque cell with a white outline, or a plain translucent square.
+        if size is None:
+            size = self.block_size
+        key = (color, alpha, size)
+        sprite = self.blocks.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size, size))
+            if alpha < 255:
+                sprite.set_alpha(alpha)
+                sprite.fill(color)
+            else:
+                rect = sprite.get_rect()
+                pygame.draw.rect(sprite, color, rect)
+                pygame.draw.rect(sprite, WHITE, rect, 1)
+            self.blocks[key] = sprite
+        return sprite
+    
+    def stats(self):
+        return {
+            'texts': len(self.texts),
+            'blocks': len(self.blocks),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
\ No newline at end of file
@@ -0,0 +1,214 @@
+import argparse
+import struct
+import zlib
+
+from bitboard_game import GAME_ENGINES
+from tetromino import Tetromino
+
+MAGIC = b'TRPL\x01'
+GAME_LENGTH = struct.Struct('<I')
+GAME_HEADER = struct.Struct('<BBqIIBBB')
+PLACEMENT = struct.Struct('<BbbH')
+
+class GameRecord:
+    def __init__(self, width, height, seed=None, generator=''):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.generator = generator
+        self.placements = []
+        self.tail = ''
+        self.score = 0
+        self.lines = 0
+    
+    def get_pieces(self):
+        # Every shape dealt, in order: one per placement, then the current and
+        # next piece that were still waiting when the game ended.
+        return ''.join(placement[0] for placement in self.placements) + self.tail
+    
+    def encode(self):
+        name = self.generator.encode()
+        tail = [Tetromino.SHAPE_TYPES.index(shape_type) for shape_type in self.tail.ljust(2, 'I')[:2]]
+        parts = [
+            GAME_HEADER.pack(self.width, self.height, -1 if self.seed is None else self.seed,
+                             self.score, self.lines, tail[0], tail[1], len(name)),
+            name
+        ]
+        for shape_type, rotation, x, y, bonus in self.placements:
+            parts.append(PLACEMENT.pack(Tetromino.SHAPE_TYPES.index(shape_type) << 2 | rotation, x, y, bonus))
+        return zlib.compress(b''.join(parts), 9)
+    
+    @classmethod
+    def decode(cls, payload):
+        data = zlib.decompress(payload)
+        width, height, seed, score, lines, tail0, tail1, name_length = GAME_HEADER.unpack_from(data)
+        offset = GAME_HEADER.size
+        record = cls(width, height, None if seed < 0 else seed, data[offset:offset + name_length].decode())
+        record.score = score
+        record.lines = lines
+        record.tail = Tetromino.SHAPE_TYPES[tail0] + Tetromino.SHAPE_TYPES[tail1]
+        for packed, x, y, bonus in PLACEMENT.iter_unpack(data[offset + name_length:]):
+            record.placements.append((Tetromino.SHAPE_TYPES[packed >> 2], packed & 3, x, y, bonus))
+        return record
+
+class GameRecorder:
+    # Attached as game.recorder; place_piece and reset_game report to it.
+    # Finished games are appended to the file one by one.
+    def __init__(self, path, seed=None, generator=''):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.seed = seed
+        self.generator = generator
+        self.record = None
+        self.last_score = 0
+        self.games_written = 0
+    
+    def attach(self, game):
+        game.recorder = self
+        self.start_game(game)
+    
+    def start_game(self, game):
+        self.record = GameRecord(game.BOARD_WIDTH, game.BOARD_HEIGHT, self.seed, self.generator)
+        self.last_score = game.score
+    
+    def record_placement(self, game, piece, score_before):
+        # Points from soft and hard drops are stored per piece so that playback
+        # reproduces the score, not just the board.
+        if self.record is None:
+            return
+        self.record.placements.append((piece.shape_type, piece.rotation, piece.x, piece.y,
+                                       score_before - self.last_score))
+        self.last_score = game.score
+        if game.game_over:
+            self.finish_game(game)
+    
+    def finish_game(self, game):
+        record = self.record
+        self.record = None
+        if record is None or not record.placements:
+            return
+        record.tail = game.current_piece.shape_type + game.next_piece.shape_type
+        record.score = game.score
+        record.lines = game.lines_cleared
+        payload = record.encode()
+        self.file.write(GAME_LENGTH.pack(len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+        self.games_written += 1
+    
+    def close(self, game=None):
+        if game is not None and self.record is not None:
+            self.finish_game(game)
+        self.file.close()
+
+def read_games(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        while True:
+            header = f.read(GAME_LENGTH.size)
+            if len(header) < GAME_LENGTH.size:
+                return
+            (length,) = GAME_LENGTH.unpack(header)
+            yield GameRecord.decode(f.read(length))
+
+class ReplaySource:
+    def __init__(self, pieces, position=0):
+        self.pieces = pieces
+        self.position = position
+    
+    def __call__(self):
+        shape_type = self.pieces[self.position % len(self.pieces)]
+        self.position += 1
+        return shape_type
+    
+    def peek(self, count):
+        return [self.pieces[(self.position + i) % len(self.pieces)] for i in range(count)]
+
+class ReplayPlayer:
+    def __init__(self, record, engine='list', keyframe_interval=32):
+        self.record = record
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.pieces = record.get_pieces()
+        self.keyframes = []
+        self.build_keyframes()
+    
+    def __len__(self):
+        return len(self.record.placements)
+    
+    def apply(self, game, index):
+        _, rotation, x, y, bonus = self.record.placements[index]
+        piece = game.current_piece
+        piece.rotation = rotation
+        piece.x = x
+        piece.y = y
+        game.score += bonus
+        game.place_piece(piece)
+    
+    def build_keyframes(self):
+        # One pass over the whole game, snapshotting every keyframe_interval
+        # moves, so any seek re-simulates at most keyframe_interval moves.
+        game = GAME_ENGINES[self.engine](self.record.width, self.record.height, ReplaySource(self.pieces))
+        self.keyframes.append((game.snapshot(), game.piece_source.position))
+        for index in range(len(self) - len(self) % self.keyframe_interval):
+            self.apply(game, index)
+            if (index + 1) % self.keyframe_interval == 0:
+                self.keyframes.append((game.snapshot(), game.piece_source.position))
+    
+    def seek(self, move):
+        # Board after the first `move` placements, from the nearest keyframe.
+        move = max(0, min(move, len(self)))
+        keyframe = move // self.keyframe_interval
+        snapshot, position = self.keyframes[keyframe]
+        game = snapshot.snapshot()
+        game.piece_source = ReplaySource(self.pieces, position)
+        for index in range(keyframe * self.keyframe_interval, move):
+            self.apply(game, index)
+        return game
+    
+    def play(self, start=0):
+        game = self.seek(start)
+        yield game
+        for index in range(start, len(self)):
+            self.apply(game, index)
+            yield game
+
+def format_board(game):
+    rows = []
+    cells = {(x, y) for x, y in game.current_piece.get_blocks()}
+    for y in range(game.BOARD_HEIGHT):
+        rows.append(''.join('#' if game.board[y][x] else '@' if (x, y) in cells else '.'
+                            for x in range(game.BOARD_WIDTH)))
+    return '\n'.join(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="List, verify and seek recorded games.")
+    parser.add_argument('path')
+    parser.add_argument('--game', type=int, default=None, help="index of the game to show")
+    parser.add_argument('--move', type=int, default=None, help="show the board after this many placements")
+    parser.add_argument('--verify', action='store_true', help="re-simulate every game and compare the final score")
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    args = parser.parse_args()
+    
+    mismatches = 0
+    for index, record in enumerate(read_games(args.path)):
+        if args.game is not None and index != args.game:
+            continue
+        print(f"game {index}: {len(record.placements)} pieces, lines={record.lines} score={record.score} "
+              f"generator={record.generator or '-'} seed={record.seed}")
+        if args.verify:
+            game = ReplayPlayer(record, args.engine).seek(len(record.placements))
+            if (game.score, game.lines_cleared) != (record.score, record.lines):
+                mismatches += 1
+                print(f"  MISMATCH: replayed lines={game.lines_cleared} score={game.score}")
+        if args.game is not None and args.move is not None:
+            game = ReplayPlayer(record, args.engine).seek(args.move)
+            print(f"after {args.move} moves: lines={game.lines_cleared} score={game.score}")
+            print(format_board(game))
+    if args.verify:
+        print(f"{mismatches} mismatches")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,6 +1,8 @@
 import random
 
 class Tetromino:
+    __slots__ = ('shape_type', 'shapes', 'color', 'rotation', 'x', 'y')
+    
     SHAPES = {
         'I': [
             ['.....',
@@ -91,8 +93,8 @@ class Tetromino:
         ],
         'L': [
             ['.....',
-             '..#..',
-             '..#..',
+             '.#...',
+             '.#...',
              '.##..',
              '.....'],
             ['.....',
@@ -125,7 +127,7 @@ class Tetromino:
     
     def __init__(self, shape_type=None):
         if shape_type is None:
-            self.shape_type = random.choice(list(self.SHAPES.keys()))
+            self.shape_type = random.choice(self.SHAPE_TYPES)
         else:
             self.shape_type = shape_type
             
@@ -135,41 +137,60 @@ class Tetromino:
         self.x = 3
         self.y = 0
         
-    def get_shape(self):
-        return self.shapes[self.rotation]
-    
-    def get_rotated_shape(self):
-        next_rotation = (self.rotation + 1) % len(self.shapes)
-        return self.shapes[next_rotation]
-    
     def rotate(self):
         self.rotation = (self.rotation + 1) % len(self.shapes)
     
-    def get_blocks(self):
-        blocks = []
-        shape = self.get_shape()
-        for row_idx, row in enumerate(shape):
-            for col_idx, cell in enumerate(row):
-                if cell == '#':
-                    blocks.append((self.x + col_idx, self.y + row_idx))
-        return blocks
+    def get_offsets(self, rotation=None):
+        if rotation is None:
+            rotation = self.rotation
+        return self.BLOCKS[self.shape_type][rotation]
     
-    def get_rotated_blocks(self):
-        blocks = []
-        shape = self.get_rotated_shape()
-        for row_idx, row in enumerate(shape):
-            for col_idx, cell in enumerate(row):
-                if cell == '#':
-                    blocks.append((self.x + col_idx, self.y + row_idx))
-        return blocks
+    def get_blocks(self):
+        x = self.x
+        y = self.y
+        return [(x + dx, y + dy) for dx, dy in self.BLOCKS[self.shape_type][self.rotation]]
     
     def move(self, dx, dy):
         self.x += dx
         self.y += dy
     
     def copy(self):
-        new_piece = Tetromino(self.shape_type)
+        new_piece = Tetromino.__new__(Tetromino)
+        new_piece.shape_type = self.shape_type
+        new_piece.shapes = self.shapes
+        new_piece.color = self.color
         new_piece.rotation = self.rotation
         new_piece.x = self.x
         new_piece.y = self.y
-        return new_piece
\ No newline at end of file
+        return new_piece
+
+def _compile_blocks(shape):
+    return tuple((col_idx, row_idx)
+                 for row_idx, row in enumerate(shape)
+                 for col_idx, cell in enumerate(row)
+                 if cell == '#')
+
+def _compile_bounds(blocks):
+    xs = [dx for dx, _ in blocks]
+    ys = [dy for _, dy in blocks]
+    return (min(xs), max(xs), min(ys), max(ys))
+
+def _compile_profile(blocks, pick):
+    profile = {}
+    for dx, dy in blocks:
+        profile[dx] = pick(profile.get(dx, dy), dy)
+    return tuple(sorted(profile.items()))
+
+# Every query about a piece's cells goes through these tables, which are
+# built once from SHAPES: BLOCKS holds the (dx, dy) cell offsets per rotation,
+# BOUNDS is (min_dx, max_dx, min_dy, max_dy), and the profiles list
+# (dx, lowest dy) / (dx, highest dy) for each column the piece covers.
+Tetromino.SHAPE_TYPES = tuple(Tetromino.SHAPES)
+Tetromino.BLOCKS = {shape_type: tuple(_compile_blocks(shape) for shape in shapes)
+                    for shape_type, shapes in Tetromino.SHAPES.items()}
+Tetromino.BOUNDS = {shape_type: tuple(_compile_bounds(blocks) for blocks in rotations)
+                    for shape_type, rotations in Tetromino.BLOCKS.items()}
+Tetromino.BOTTOM_PROFILE = {shape_type: tuple(_compile_profile(blocks, max) for blocks in rotations)
+                            for shape_type, rotations in Tetromino.BLOCKS.items()}
+Tetromino.TOP_PROFILE = {shape_type: tuple(_compile_profile(blocks, min) for blocks in rotations)
+                         for shape_type, rotations in Tetromino.BLOCKS.items()}
\ No newline at end of file
@@ -0,0 +1,208 @@
+import argparse
+import itertools
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from headless import HeadlessRunner
+from piece_generator import PIECE_GENERATORS
+
+Z_95 = 1.959964
+
+def parse_contender(spec):
+    # 'default', comma-separated weights (four, or ten with the extended
+    # ones), or a weights JSON file; an optional 'name=' prefix labels it.
+    name, _, value = spec.rpartition('=')
+    name = name or spec
+    extended_weights = None
+    if value == 'default':
+        weights = TetrisAI().get_weights()
+    elif ',' in value:
+        numbers = tuple(float(part) for part in value.split(','))
+        basic_count = len(TetrisAI.WEIGHT_NAMES)
+        if len(numbers) not in (basic_count, basic_count + len(TetrisAI.EXTENDED_WEIGHT_NAMES)):
+            raise ValueError(f"{spec}: expected {basic_count} or "
+                             f"{basic_count + len(TetrisAI.EXTENDED_WEIGHT_NAMES)} weights")
+        weights = numbers[:basic_count]
+        extended_weights = numbers[basic_count:] or None
+    else:
+        weights = TetrisAI.read_weights(value)
+        extended_weights = TetrisAI.read_extended_weights(value)
+    return {'name': name, 'weights': weights, 'extended_weights': extended_weights}
+
+def play_seed(contender, seed, engine='list', backend='python', max_pieces=None, pieces='uniform', depth=1):
+    # Runs in a worker process. The piece sequence depends only on the seed,
+    # so every contender meets exactly the same pieces on a given seed.
+    runner = HeadlessRunner(contender['weights'], engine, max_pieces, backend, depth=depth, pieces=pieces)
+    runner.ai.set_extended_weights(contender['extended_weights'])
+    return runner.play_game(runner.create_game(seed))
+
+def sign_test(wins, losses):
+    # Exact two-sided binomial test of wins against losses; ties are dropped.
+    games = wins + losses
+    if games == 0:
+        return 1.0
+    tail = sum(math.comb(games, k) for k in range(min(wins, losses) + 1)) / 2 ** games
+    return min(1.0, 2 * tail)
+
+def sprt_bounds(alpha, delta):
+    # Sign-test SPRT between "first wins a seed with probability 1/2 + delta"
+    # and "... 1/2 - delta". The log-likelihood ratio is (wins - losses) times
+    # a constant, so the test stops once the lead crosses a fixed margin.
+    step = math.log((0.5 + delta) / (0.5 - delta))
+    return math.log((1 - alpha) / alpha) / step
+
+def paired_summary(first_lines, second_lines):
+    differences = [a - b for a, b in zip(first_lines, second_lines)]
+    count = len(differences)
+    spread = statistics.stdev(differences) if count > 1 else 0.0
+    first_spread = statistics.stdev(first_lines) if count > 1 else 0.0
+    second_spread = statistics.stdev(second_lines) if count > 1 else 0.0
+    wins = sum(1 for difference in differences if difference > 0)
+    losses = sum(1 for difference in differences if difference < 0)
+    return {
+        'games': count,
+        'first_mean': statistics.fmean(first_lines),
+        'first_ci': Z_95 * first_spread / math.sqrt(count),
+        'second_mean': statistics.fmean(second_lines),
+        'second_ci': Z_95 * second_spread / math.sqrt(count),
+        'mean_difference': statistics.fmean(differences),
+        'difference_ci': Z_95 * spread / math.sqrt(count),
+        'wins': wins,
+        'losses': losses,
+        'ties': count - wins - losses,
+        'sign_p': sign_test(wins, losses)
+    }
+
+class Tournament:
+    # Round-robin of paired matchups. Each seed is played by both contenders,
+    # and a contender's game on a seed is played once and reused against every
+    # opponent. Results are taken strictly in seed order even though workers
+    # finish out of order: short games finish first, and stopping on whatever
+    # arrived first would favour whoever loses quickly.
+    def __init__(self, contenders, seed=0, engine='list', backend='python', max_pieces=1000, pieces='uniform',
+                 depth=1, workers=None, alpha=0.05, delta=0.05, min_games=10, max_games=200):
+        self.contenders = contenders
+        self.seed = seed
+        self.settings = (engine, backend, max_pieces, pieces, depth)
+        self.workers = workers or os.cpu_count()
+        self.alpha = alpha
+        self.delta = delta
+        self.min_games = min_games
+        self.max_games = max_games
+        self.margin = sprt_bounds(alpha, delta)
+        self.results = {}
+        self.pending = {}
+        self.games_started = 0
+    
+    def submit(self, executor, contender, seed):
+        key = (contender['name'], seed)
+        if key not in self.results and key not in self.pending:
+            self.pending[key] = executor.submit(play_seed, contender, seed, *self.settings)
+            self.games_started += 1
+    
+    def result(self, contender, seed):
+        key = (contender['name'], seed)
+        if key not in self.results:
+            self.results[key] = self.pending.pop(key).result()
+        return self.results[key]
+    
+    def play_matchup(self, executor, first, second):
+        # Keeps the workers busy a few seeds ahead of the one being judged;
+        # seeds queued past the stopping point are cancelled afterwards.
+        lookahead = 2 * self.workers
+        first_lines = []
+        second_lines = []
+        lead = 0
+        decision = 0
+        for index in range(self.max_games):
+            for ahead in range(index, min(index + lookahead, self.max_games)):
+                self.submit(executor, first, self.seed + ahead)
+                self.submit(executor, second, self.seed + ahead)
+            first_lines.append(self.result(first, self.seed + index)['lines'])
+            second_lines.append(self.result(second, self.seed + index)['lines'])
+            if first_lines[-1] != second_lines[-1]:
+                lead += 1 if first_lines[-1] > second_lines[-1] else -1
+            if len(first_lines) >= self.min_games and abs(lead) >= self.margin:
+                decision = 1 if lead > 0 else -1
+                break
+        
+        self.cancel_from(self.seed + len(first_lines))
+        summary = paired_summary(first_lines, second_lines)
+        summary['first'] = first['name']
+        summary['second'] = second['name']
+        summary['decision'] = decision
+        return summary
+    
+    def cancel_from(self, seed):
+        # Games already running are kept; a later matchup may still use them.
+        for key in [key for key in self.pending if key[1] >= seed]:
+            if self.pending[key].cancel():
+                del self.pending[key]
+                self.games_started -= 1
+    
+    def run(self):
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for first, second in itertools.combinations(self.contenders, 2):
+                yield self.play_matchup(executor, first, second)
+            self.cancel_from(self.seed)
+
+def format_matchup(summary):
+    if summary['decision'] > 0:
+        verdict = f"{summary['first']} wins"
+    elif summary['decision'] < 0:
+        verdict = f"{summary['second']} wins"
+    else:
+        verdict = "no clear winner"
+    return (f"{summary['first']} vs {summary['second']}: {verdict} after {summary['games']} seeds "
+            f"(W {summary['wins']} / L {summary['losses']} / T {summary['ties']}, sign test p={summary['sign_p']:.3g})\n"
+            f"  mean lines {summary['first_mean']:.1f} ± {summary['first_ci']:.1f} vs "
+            f"{summary['second_mean']:.1f} ± {summary['second_ci']:.1f}, "
+            f"paired difference {summary['mean_difference']:+.1f} ± {summary['difference_ci']:.1f} (95% CI)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare AI weight sets on shared seeded piece sequences with paired statistics and early stopping.")
+    parser.add_argument('contenders', nargs='+',
+                        help="'default', comma-separated weights or a weights JSON file, optionally prefixed with name=")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-games', type=int, default=10, help="seeds to play before a matchup may stop")
+    parser.add_argument('--max-games', type=int, default=200, help="seeds after which a matchup is called a draw")
+    parser.add_argument('--alpha', type=float, default=0.05, help="error rate of the sequential test")
+    parser.add_argument('--delta', type=float, default=0.05,
+                        help="indifference zone: a seed win rate within 0.5 ± delta counts as even")
+    parser.add_argument('--max-pieces', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--pieces', default='uniform',
+                        help=f"piece generator: {', '.join(PIECE_GENERATORS)} or a fixed sequence like IOTSZJL")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    args = parser.parse_args()
+    
+    contenders = [parse_contender(spec) for spec in args.contenders]
+    if len(contenders) < 2 or len({contender['name'] for contender in contenders}) < len(contenders):
+        parser.error("need at least two contenders with distinct names")
+    
+    tournament = Tournament(contenders, args.seed, args.engine, args.backend, args.max_pieces, args.pieces,
+                            args.depth, args.workers, args.alpha, args.delta, args.min_games, args.max_games)
+    print(f"{len(contenders)} contenders; a matchup stops once one side leads by "
+          f"{math.ceil(tournament.margin)} seed wins (alpha {args.alpha}, delta {args.delta})")
+    points = {contender['name']: 0.0 for contender in contenders}
+    for summary in tournament.run():
+        print(format_matchup(summary), flush=True)
+        if summary['decision'] == 0:
+            points[summary['first']] += 0.5
+            points[summary['second']] += 0.5
+        else:
+            points[summary['first'] if summary['decision'] > 0 else summary['second']] += 1
+    
+    print(f"{tournament.games_started} games played, against {args.max_games * len(contenders)} "
+          f"for {args.max_games} seeds per contender without early stopping")
+    for rank, (name, score) in enumerate(sorted(points.items(), key=lambda item: item[1], reverse=True), 1):
+        print(f"{rank:>3}. {name}: {score:g} points")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
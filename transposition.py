@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from placements import get_reachable_ranges
+from tetromino import Tetromino
+
+MIRROR_PARTNERS = {
+    'I': 'I',
+    'O': 'O',
+    'T': 'T',
+    'S': 'Z',
+    'Z': 'S',
+    'J': 'L',
+    'L': 'J'
+}
+
+def _build_mirror_rotations():
+    # For each rotation, the partner rotation whose cells are this rotation's
+    # cells reflected around the column `shift`, i.e. dx' = shift - dx with dy
+    # unchanged. A piece at x then mirrors to the partner at width - 1 - x - shift.
+    # Pieces whose rotations do not all reflect onto the partner's are left
+    # out, so mirror lookups follow whatever the shape tables draw.
+    table = {}
+    for shape_type, partner in MIRROR_PARTNERS.items():
+        mapping = []
+        for rotation, blocks in enumerate(Tetromino.BLOCKS[shape_type]):
+            match = None
+            for partner_rotation, partner_blocks in enumerate(Tetromino.BLOCKS[partner]):
+                shift = Tetromino.BOUNDS[partner][partner_rotation][0] + Tetromino.BOUNDS[shape_type][rotation][1]
+                if sorted((shift - dx, dy) for dx, dy in blocks) == sorted(partner_blocks):
+                    match = (partner_rotation, shift)
+                    break
+            if match is None:
+                break
+            mapping.append(match)
+        else:
+            table[shape_type] = tuple(mapping)
+    return table
+
+MIRROR_ROTATIONS = _build_mirror_rotations()
+
+class CacheEntry:
+    __slots__ = ('moves', 'features', 'weights_version', 'reachable', 'best_move')
+    
+    def __init__(self, moves, features):
+        self.moves = moves
+        self.features = features
+        self.weights_version = None
+        self.reachable = None
+        self.best_move = None
+
+class TranspositionCache:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.reversed_rows = {}
+        self.hits = 0
+        self.mirror_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rescored = 0
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def mirror_masks(self, masks, width):
+        table = self.reversed_rows.get(width)
+        if table is None:
+            table = [int(format(mask, f'0{width}b')[::-1], 2) for mask in range(1 << width)]
+            self.reversed_rows[width] = table
+        return tuple(table[mask] for mask in masks)
+    
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+    
+    def store(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def reflect(self, entry, shape_type, width):
+        rotations = MIRROR_ROTATIONS[shape_type]
+        reflected = []
+        for (rotation, x), features in zip(entry.moves, entry.features):
+            partner_rotation, shift = rotations[rotation]
+            reflected.append(((partner_rotation, width - 1 - x - shift), features))
+        reflected.sort(key=lambda candidate: candidate[0])
+        return CacheEntry([move for move, _ in reflected], [features for _, features in reflected])
+    
+    def get_entry(self, ai, game):
+        shape_type = game.current_piece.shape_type
+        width = game.BOARD_WIDTH
+        masks = game.get_row_masks()
+        key = (masks, shape_type, width)
+        
+        entry = self.lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        
+        partner = MIRROR_PARTNERS[shape_type]
+        if partner in MIRROR_ROTATIONS:
+            mirror_entry = self.lookup((self.mirror_masks(masks, width), partner, width))
+            if mirror_entry is not None:
+                self.mirror_hits += 1
+                entry = self.reflect(mirror_entry, partner, width)
+                self.store(key, entry)
+                return entry
+        
+        # Entries hold every legal placement, which depends only on the board;
+        # what the current piece can reach is filtered per lookup.
+        self.misses += 1
+        entry = CacheEntry(*ai.get_candidates(game, reachable=False))
+        self.store(key, entry)
+        return entry
+    
+    def get_best_move(self, ai, game):
+        entry = self.get_entry(ai, game)
+        reachable = get_reachable_ranges(game)
+        if entry.weights_version != ai.weights_version or entry.reachable != reachable:
+            entry.best_move = ai.choose_move(*ai.filter_reachable(game, entry.moves, entry.features, reachable))
+            entry.weights_version = ai.weights_version
+            entry.reachable = reachable
+            self.rescored += 1
+        if entry.best_move is None:
+            return None
+        return dict(entry.best_move)
+    
+    def stats(self):
+        lookups = self.hits + self.mirror_hits + self.misses
+        return {
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'mirror_hits': self.mirror_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'rescored': self.rescored,
+            'hit_rate': (self.hits + self.mirror_hits) / lookups if lookups else 0.0
+        }
\ No newline at end of file
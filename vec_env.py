@@ -0,0 +1,162 @@
+import numpy as np
+from tetromino import Tetromino
+
+LINE_POINTS = np.array([0, 100, 300, 500, 800], dtype=np.int64)
+
+def _build_cell_tables():
+    # CELLS[shape, rotation] holds the four (dx, dy) offsets of that rotation;
+    # rotations a shape does not have repeat rotation 0 and are masked off by
+    # ROTATIONS, which counts the real ones.
+    shape_count = len(Tetromino.SHAPE_TYPES)
+    cells = np.zeros((shape_count, 4, 4, 2), dtype=np.intp)
+    rotations = np.zeros(shape_count, dtype=np.intp)
+    for index, shape_type in enumerate(Tetromino.SHAPE_TYPES):
+        blocks = Tetromino.BLOCKS[shape_type]
+        rotations[index] = len(blocks)
+        for rotation in range(4):
+            cells[index, rotation] = blocks[rotation if rotation < len(blocks) else 0]
+    return cells, rotations
+
+CELLS, ROTATIONS = _build_cell_tables()
+
+class VecTetrisEnv:
+    # N games stepped in lockstep on one (N, height, width) bool array. A step
+    # places each game's current piece like TetrisGame.apply_placement: an
+    # illegal (rotation, x) leaves that game untouched, a legal one hard-drops
+    # (+2 points per row), clears lines, scores with the post-clear level and
+    # spawns the next piece, ending the game if the spawn overlaps the stack.
+    QUEUE_SIZE = 7 * 64
+    
+    def __init__(self, num_envs, width=10, height=20, seed=None, pieces='uniform'):
+        if pieces not in ('uniform', 'bag'):
+            raise ValueError(f"unknown piece generator {pieces!r}")
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.spawn_x = (width - 4) // 2
+        self.pieces = pieces
+        self.rng = np.random.default_rng(seed)
+        self.env_index = np.arange(num_envs)
+        
+        self.boards = np.zeros((num_envs, height, width), dtype=bool)
+        self.queue = self.generate_pieces(num_envs, self.QUEUE_SIZE)
+        self.queue_position = np.zeros(num_envs, dtype=np.intp)
+        self.current = np.zeros(num_envs, dtype=np.intp)
+        self.next = np.zeros(num_envs, dtype=np.intp)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.lines = np.zeros(num_envs, dtype=np.int64)
+        self.level = np.ones(num_envs, dtype=np.int64)
+        self.pieces_placed = np.zeros(num_envs, dtype=np.int64)
+        self.game_over = np.zeros(num_envs, dtype=bool)
+        self.reset()
+    
+    def generate_pieces(self, count, length):
+        if self.pieces == 'bag':
+            keys = self.rng.random((count, -(-length // 7), 7))
+            return np.argsort(keys, axis=2).reshape(count, -1)[:, :length]
+        return self.rng.integers(0, len(Tetromino.SHAPE_TYPES), (count, length))
+    
+    def set_queue(self, queue):
+        # Replace the piece queues, e.g. with sequences shared with TetrisGame
+        # instances; a queue is refilled from the env's own RNG once used up.
+        self.queue = np.asarray(queue, dtype=np.intp).copy()
+        self.queue_position[:] = 0
+    
+    def deal(self, mask):
+        indices = np.flatnonzero(mask)
+        exhausted = indices[self.queue_position[indices] >= self.queue.shape[1]]
+        if len(exhausted):
+            self.queue[exhausted] = self.generate_pieces(len(exhausted), self.queue.shape[1])
+            self.queue_position[exhausted] = 0
+        pieces = self.queue[indices, self.queue_position[indices]]
+        self.queue_position[indices] += 1
+        return pieces
+    
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        self.boards[mask] = False
+        self.score[mask] = 0
+        self.lines[mask] = 0
+        self.level[mask] = 1
+        self.pieces_placed[mask] = 0
+        self.game_over[mask] = False
+        self.current[mask] = self.deal(mask)
+        self.next[mask] = self.deal(mask)
+        return self.get_observation()
+    
+    def piece_cells(self, shapes, rotations, xs):
+        cells = CELLS[shapes, rotations % 4]
+        return cells[:, :, 0] + xs[:, None], cells[:, :, 1]
+    
+    def collides(self, cols, rows):
+        # (N, 4) cell coordinates against each env's own board; cells outside
+        # the side walls or below the floor collide, cells above the top do not.
+        inside = (cols >= 0) & (cols < self.width) & (rows < self.height)
+        occupied = self.boards[self.env_index[:, None], np.clip(rows, 0, self.height - 1),
+                               np.clip(cols, 0, self.width - 1)]
+        return (~inside | (occupied & (rows >= 0))).any(axis=1)
+    
+    def drop_distance(self, cols, rows):
+        # Rows each piece can fall from y=0 before touching the stack or floor.
+        offsets = np.arange(self.height + 1)
+        padded = np.ones((self.num_envs, self.height + 5, self.width), dtype=bool)
+        padded[:, :self.height] = self.boards
+        clipped = np.clip(cols, 0, self.width - 1)
+        blocked = padded[self.env_index[:, None, None], offsets[None, :, None] + rows[:, None, :],
+                         clipped[:, None, :]].any(axis=2)
+        return np.argmax(blocked[:, 1:], axis=1)
+    
+    def step(self, rotations, xs):
+        rotations = np.asarray(rotations, dtype=np.intp)
+        xs = np.asarray(xs, dtype=np.intp)
+        cols, rows = self.piece_cells(self.current, rotations, xs)
+        valid = ~self.game_over & (rotations >= 0) & (rotations < ROTATIONS[self.current])
+        valid &= ~self.collides(cols, rows)
+        
+        landing = np.where(valid, self.drop_distance(cols, rows), 0)
+        reward = 2 * landing
+        placed = np.flatnonzero(valid)
+        self.boards[placed[:, None], landing[placed, None] + rows[placed], cols[placed]] = True
+        
+        full = self.boards.all(axis=2)
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            # A stable sort by "row is not full" moves full rows to the top in
+            # one gather; they are then emptied, which is the shift-down.
+            order = np.argsort(~full, axis=1, kind='stable')
+            self.boards = np.take_along_axis(self.boards, order[:, :, None], axis=1)
+            self.boards &= (np.arange(self.height)[None, :] >= cleared[:, None])[:, :, None]
+        self.lines += cleared
+        self.level = self.lines // 10 + 1
+        reward += LINE_POINTS[cleared] * self.level
+        self.score += reward
+        self.pieces_placed += valid
+        
+        self.current[placed] = self.next[placed]
+        self.next[placed] = self.deal(valid)
+        spawn_cols, spawn_rows = self.piece_cells(self.current, np.zeros_like(rotations),
+                                                  np.full(self.num_envs, self.spawn_x))
+        self.game_over |= valid & self.collides(spawn_cols, spawn_rows)
+        return reward, cleared, self.game_over.copy(), valid
+    
+    def column_heights(self):
+        covered = self.boards.any(axis=1)
+        return np.where(covered, self.height - self.boards.argmax(axis=1), 0)
+    
+    def get_features(self):
+        # (N, 4): holes, aggregate height, bumpiness and maximum height, the
+        # same quantities TetrisGame keeps incrementally.
+        covered = np.logical_or.accumulate(self.boards, axis=1)
+        holes = (covered & ~self.boards).sum(axis=(1, 2))
+        heights = self.column_heights()
+        bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+        return np.stack((holes, heights.sum(axis=1), bumpiness, heights.max(axis=1)), axis=1)
+    
+    def get_observation(self):
+        return {
+            'boards': self.boards.copy(),
+            'current': self.current.copy(),
+            'next': self.next.copy()
+        }
\ No newline at end of file
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from weight_sweep import WEIGHT_MIN, WEIGHT_MAX, evaluate_weights
+
+# Validation seeds start here, clear of the per-generation training seeds.
+VALIDATION_SEED_OFFSET = 1000000
+
+class CrossEntropyOptimizer:
+    def __init__(self, population=50, elite_fraction=0.2, initial_std=5.0, extra_noise=1.0, noise_decay=0.9,
+                 games=5, max_pieces=2000, seed=0, engine='list', backend='python', workers=None,
+                 checkpoint_path='optimizer_checkpoint.json', best_path='best_weights.json'):
+        self.population = population
+        self.elite_count = max(2, int(round(population * elite_fraction)))
+        self.extra_noise = extra_noise
+        self.noise_decay = noise_decay
+        self.games = games
+        self.max_pieces = max_pieces
+        self.seed = seed
+        self.engine = engine
+        self.backend = backend
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.best_path = best_path
+        
+        self.mean = list(TetrisAI().get_weights())
+        self.std = [initial_std] * len(self.mean)
+        self.generation = 0
+        self.evaluations = 0
+        self.best = None
+        self.history = []
+    
+    def state(self):
+        return {
+            'generation': self.generation,
+            'evaluations': self.evaluations,
+            'mean': self.mean,
+            'std': self.std,
+            'best': self.best,
+            'history': self.history
+        }
+    
+    def save_checkpoint(self):
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state(), f, indent=2)
+        os.replace(temp_path, self.checkpoint_path)
+        if self.best is not None:
+            TetrisAI.write_weights(self.best_path, self.best['weights'],
+                                   mean_lines=self.best['mean_lines'], generation=self.best['generation'])
+    
+    def load_checkpoint(self):
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        self.generation = state['generation']
+        self.evaluations = state['evaluations']
+        self.mean = state['mean']
+        self.std = state['std']
+        self.best = state['best']
+        self.history = state['history']
+    
+    def sample(self):
+        rng = random.Random(self.seed * 1000003 + self.generation)
+        noise = self.extra_noise * self.noise_decay ** self.generation
+        samples = []
+        for _ in range(self.population):
+            weights = []
+            for mean, std in zip(self.mean, self.std):
+                value = rng.gauss(mean, (std * std + noise) ** 0.5)
+                weights.append(round(min(WEIGHT_MAX, max(WEIGHT_MIN, value)), 4))
+            samples.append(tuple(weights))
+        return samples
+    
+    def evaluate(self, executor, samples, seeds=None):
+        if seeds is None:
+            first_seed = self.seed + self.generation * self.games
+            seeds = [first_seed + index for index in range(self.games)]
+        futures = [executor.submit(evaluate_weights, weights, seeds, self.engine, self.backend, self.max_pieces)
+                   for weights in samples]
+        return [future.result() for future in futures]
+    
+    def validation_seeds(self):
+        first_seed = self.seed + VALIDATION_SEED_OFFSET
+        return [first_seed + index for index in range(self.games)]
+    
+    def generation_cost(self):
+        # The population on this generation's seeds, plus the generation's top
+        # sample on the validation seeds.
+        return (self.population + 1) * self.games
+    
+    def update_best(self, executor, top_weights, top_row):
+        # Each generation plays different seeds, so its top score is partly the
+        # luck of those seeds. best_weights.json only changes when the new top
+        # sample beats the incumbent on the shared validation seeds.
+        seeds = self.validation_seeds()
+        contenders = [top_weights]
+        if self.best is not None and self.best.get('validation_seeds') != seeds:
+            contenders.append(tuple(self.best['weights']))
+        rows = self.evaluate(executor, contenders, seeds)
+        self.evaluations += len(contenders) * self.games
+        if len(rows) > 1:
+            self.best['mean_lines'] = rows[1]['mean_lines']
+            self.best['validation_seeds'] = seeds
+        
+        if self.best is None or rows[0]['mean_lines'] > self.best['mean_lines']:
+            self.best = {
+                'weights': list(top_weights),
+                'mean_lines': rows[0]['mean_lines'],
+                'training_lines': top_row['mean_lines'],
+                'validation_seeds': seeds,
+                'generation': self.generation
+            }
+        return rows[0]['mean_lines']
+    
+    def step(self, executor):
+        samples = self.sample()
+        rows = self.evaluate(executor, samples)
+        self.evaluations += len(samples) * self.games
+        
+        ranked = sorted(zip(rows, samples), key=lambda pair: pair[0]['mean_lines'], reverse=True)
+        elite = [weights for _, weights in ranked[:self.elite_count]]
+        self.mean = [statistics.fmean(values) for values in zip(*elite)]
+        self.std = [statistics.pstdev(values) for values in zip(*elite)]
+        
+        top_row, top_weights = ranked[0]
+        validation_lines = self.update_best(executor, top_weights, top_row)
+        
+        stats = {
+            'generation': self.generation,
+            'evaluations': self.evaluations,
+            'best_lines': top_row['mean_lines'],
+            'validation_lines': validation_lines,
+            'elite_lines': statistics.fmean(row['mean_lines'] for row, _ in ranked[:self.elite_count]),
+            'population_lines': statistics.fmean(row['mean_lines'] for row in rows),
+            'mean': self.mean,
+            'std': self.std
+        }
+        self.history.append(stats)
+        self.generation += 1
+        self.save_checkpoint()
+        return stats
+    
+    def run(self, budget):
+        generation_cost = self.generation_cost()
+        if budget < generation_cost:
+            raise ValueError(f"a budget of {budget} games is less than one generation ({generation_cost} games)")
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while self.evaluations + generation_cost <= budget:
+                yield self.step(executor)
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn AI weights with a noisy cross-entropy method and parallel headless rollouts.")
+    parser.add_argument('--budget', type=int, default=5000, help="total number of games to play")
+    parser.add_argument('--population', type=int, default=50)
+    parser.add_argument('--elite-fraction', type=float, default=0.2)
+    parser.add_argument('--initial-std', type=float, default=5.0)
+    parser.add_argument('--extra-noise', type=float, default=1.0)
+    parser.add_argument('--games', type=int, default=5, help="games per weight vector in each generation")
+    parser.add_argument('--max-pieces', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    parser.add_argument('--checkpoint', default='optimizer_checkpoint.json')
+    parser.add_argument('--best', default='best_weights.json')
+    parser.add_argument('--resume', action='store_true')
+    args = parser.parse_args()
+    
+    optimizer = CrossEntropyOptimizer(args.population, args.elite_fraction, args.initial_std, args.extra_noise,
+                                      games=args.games, max_pieces=args.max_pieces, seed=args.seed,
+                                      engine=args.engine, backend=args.backend, workers=args.workers,
+                                      checkpoint_path=args.checkpoint, best_path=args.best)
+    if args.resume and os.path.exists(args.checkpoint):
+        optimizer.load_checkpoint()
+        print(f"Resuming at generation {optimizer.generation} after {optimizer.evaluations} games")
+    
+    if args.budget < optimizer.generation_cost():
+        parser.error(f"--budget {args.budget} is less than one generation: (population + 1) x games = "
+                     f"{optimizer.generation_cost()} games")
+    
+    for stats in optimizer.run(args.budget):
+        print(f"generation {stats['generation']:>3}: best {stats['best_lines']:.1f} lines "
+              f"({stats['validation_lines']:.1f} on validation seeds), "
+              f"elite {stats['elite_lines']:.1f}, population {stats['population_lines']:.1f}, "
+              f"mean weights {' '.join(f'{value:.2f}' for value in stats['mean'])} "
+              f"({stats['evaluations']}/{args.budget} games)")
+    
+    if optimizer.best is not None:
+        print(f"Best weights {optimizer.best['weights']} ({optimizer.best['mean_lines']:.1f} lines on the "
+              f"validation seeds) saved to {args.best}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
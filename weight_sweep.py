@@ -0,0 +1,163 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai_player import TetrisAI
+from bitboard_game import GAME_ENGINES
+from headless import HeadlessRunner, summarize
+
+WEIGHT_NAMES = TetrisAI.WEIGHT_NAMES
+# Rows can only be compared when they were played on the same games, so the
+# settings that pick those games are stored in every row.
+SETTING_FIELDS = ('games', 'seed', 'max_pieces')
+RESULT_FIELDS = WEIGHT_NAMES + SETTING_FIELDS + ('mean_lines', 'mean_score', 'mean_pieces', 'min_lines', 'max_lines')
+WEIGHT_MIN = -10.0
+WEIGHT_MAX = 10.0
+
+def grid_configs(steps):
+    if steps < 2:
+        raise ValueError("A grid sweep needs at least two steps per weight")
+    values = [round(WEIGHT_MIN + (WEIGHT_MAX - WEIGHT_MIN) * i / (steps - 1), 4) for i in range(steps)]
+    return [tuple(config) for config in itertools.product(values, repeat=len(WEIGHT_NAMES))]
+
+def random_configs(samples, seed):
+    rng = random.Random(seed)
+    return [tuple(round(rng.uniform(WEIGHT_MIN, WEIGHT_MAX), 4) for _ in WEIGHT_NAMES)
+            for _ in range(samples)]
+
+def weights_key(weights):
+    return tuple(round(float(weight), 4) for weight in weights)
+
+def evaluate_weights(weights, seeds, engine='list', backend='python', max_pieces=None):
+    runner = HeadlessRunner(weights, engine, max_pieces, backend)
+    results = [runner.play_game(runner.create_game(seed)) for seed in seeds]
+    summary = summarize(results)
+    lines = [result['lines'] for result in results]
+    
+    row = dict(zip(WEIGHT_NAMES, weights))
+    row.update({
+        'games': len(results),
+        'seed': seeds[0],
+        'max_pieces': max_pieces,
+        'mean_lines': summary['mean_lines'],
+        'mean_score': summary['mean_score'],
+        'mean_pieces': summary['pieces'] / len(results),
+        'min_lines': min(lines),
+        'max_lines': max(lines)
+    })
+    return row
+
+def load_results(path, settings):
+    # An interrupted run can leave a partial last line; it is dropped and the
+    # file rewritten without it, so appending carries on from a clean row.
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as f:
+        text = f.read()
+    lines = text.splitlines(keepends=True)
+    partial = bool(lines) and not lines[-1].endswith('\n')
+    if partial:
+        lines.pop()
+    
+    reader = csv.DictReader(lines)
+    missing = [field for field in RESULT_FIELDS if field not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column; it was not written by this sweep")
+    rows = []
+    for line_number, row in enumerate(reader, 2):
+        try:
+            rows.append({field: float(row[field]) for field in RESULT_FIELDS})
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}:{line_number}: malformed row") from None
+    
+    for row in rows:
+        different = [field for field in SETTING_FIELDS if row[field] != settings[field]]
+        if different:
+            found = ', '.join(f"{field}={row[field]:g}" for field in different)
+            raise ValueError(f"{path} holds results for {found}; use another --output to sweep with "
+                             + ', '.join(f"{field}={settings[field]}" for field in different))
+    if partial:
+        print(f"dropped an incomplete last row from {path}")
+        write_results(path, rows)
+    return rows
+
+def rank_results(rows):
+    return sorted(rows, key=lambda row: (row['mean_lines'], row['mean_score']), reverse=True)
+
+def write_results(path, rows):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_path, path)
+
+def run_sweep(configs, output, games=10, seed=0, workers=None, engine='list', backend='python', max_pieces=2000):
+    rows = load_results(output, {'games': games, 'seed': seed, 'max_pieces': max_pieces})
+    done = {weights_key(row[name] for name in WEIGHT_NAMES) for row in rows}
+    pending = [config for config in configs if weights_key(config) not in done]
+    seeds = [seed + index for index in range(games)]
+    print(f"{len(configs)} configurations, {len(configs) - len(pending)} already in {output}, {len(pending)} to run")
+    
+    new_file = not os.path.exists(output)
+    with open(output, 'a', newline='') as journal:
+        writer = csv.DictWriter(journal, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(evaluate_weights, config, seeds, engine, backend, max_pieces)
+                       for config in pending]
+            for completed, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                writer.writerow(row)
+                journal.flush()
+                rows.append(row)
+                print(f"[{completed}/{len(pending)}] " +
+                      " ".join(f"{row[name]:6.2f}" for name in WEIGHT_NAMES) +
+                      f" -> mean lines {row['mean_lines']:.1f}")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    ranked = rank_results(rows)
+    write_results(output, ranked)
+    return ranked
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the four AI weights with headless games on all cores.")
+    parser.add_argument('--mode', choices=['grid', 'random'], default='random')
+    parser.add_argument('--steps', type=int, default=5, help="grid points per weight in grid mode")
+    parser.add_argument('--samples', type=int, default=200, help="configurations drawn in random mode")
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--games', type=int, default=10, help="games per configuration, same seeds for every configuration")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-pieces', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--engine', choices=sorted(GAME_ENGINES), default='list')
+    parser.add_argument('--backend', choices=TetrisAI.BACKENDS, default='python')
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    
+    if args.mode == 'grid':
+        configs = grid_configs(args.steps)
+    else:
+        configs = random_configs(args.samples, args.sample_seed)
+    
+    try:
+        ranked = run_sweep(configs, args.output, args.games, args.seed, args.workers,
+                           args.engine, args.backend, args.max_pieces)
+    except ValueError as error:
+        parser.error(str(error))
+    
+    print(f"Top {min(args.top, len(ranked))} of {len(ranked)} configurations:")
+    for rank, row in enumerate(ranked[:args.top], 1):
+        print(f"{rank:>3}. " + " ".join(f"{row[name]:6.2f}" for name in WEIGHT_NAMES) +
+              f"  mean lines {row['mean_lines']:.1f}  mean score {row['mean_score']:.0f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file